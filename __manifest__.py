@@ -50,6 +50,11 @@ reducing manual work and ensuring data consistency between systems.
         'views/res_config_settings_views.xml',
         'views/sale_order_views.xml',
         'views/product_views.xml',
+        'views/esprinet_auth_token_views.xml',
+        'views/esprinet_circuit_breaker_views.xml',
+        'views/esprinet_catalogue_run_views.xml',
+        'views/esprinet_catalogue_staging_views.xml',
+        'views/esprinet_reprice_job_views.xml',
         'data/cron.xml',
         'data/res_partner_data.xml',
     ],
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la importación del catálogo con Catalogue.json sintéticos
+(benchmarks/catalogue_generator.py) servidos por un FTP local
+(benchmarks/ftp_server.py).
+
+Uso:
+    python benchmarks/catalogue_benchmark.py --sizes 1k,10k,100k
+    python benchmarks/catalogue_benchmark.py --sizes 10k --save-baseline
+    python benchmarks/catalogue_benchmark.py --sizes 10k -c odoo.conf -d bench_db
+
+Sin Odoo se miden las fases que no tocan la base de datos: descarga por
+FTP, parseo en streaming, cálculo de valores (transform_rows), huellas y
+codificación CSV para el COPY del staging. Con -c/-d se ejecutan además
+la descarga y la importación reales de esprinet.catalogue.service sobre
+esa base de datos, dos veces (altas y reimportación sin cambios).
+¡Crea productos! Usar sólo una base de datos desechable.
+
+Para cada fase se informa de filas/s y pico de memoria (rss muestreado
+durante la fase); las fases con Odoo informan además de las consultas
+SQL, desglosadas por las fases de la importación (match, create,
+update, commit...). Las medidas se comparan con
+benchmarks/baselines/catalogue_<tamaño>.json si existe y se marcan las
+regresiones por encima del umbral (--threshold); con --save-baseline se
+guardan como nueva referencia. Termina con código 1 si hay regresiones.
+Las fases sin Odoo se repiten (--repeat) y se toma la medida más rápida.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import Counter
+from datetime import datetime
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE_DIR = os.path.dirname(BENCHMARKS_DIR)
+SERVICES_DIR = os.path.join(MODULE_DIR, 'services')
+BASELINE_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+
+sys.path.insert(0, BENCHMARKS_DIR)
+
+# Los módulos de services/ que no dependen de Odoo se cargan como paquete
+# sin ejecutar services/__init__.py, que importa los servicios del ORM
+_services = types.ModuleType('esprinet_services')
+_services.__path__ = [SERVICES_DIR]
+sys.modules.setdefault('esprinet_services', _services)
+
+from esprinet_services import codec, memory  # noqa: E402
+from esprinet_services.catalogue_index import row_fingerprint  # noqa: E402
+from esprinet_services.catalogue_profile import CatalogueProfile  # noqa: E402
+from esprinet_services.catalogue_staging import iter_copy_chunks, staging_record  # noqa: E402
+from esprinet_services.catalogue_transform import TRANSFORM_BACKEND, iter_row_chunks, transform_rows  # noqa: E402
+from esprinet_services.json_stream import iter_array_items, iter_file_chunks  # noqa: E402
+
+import catalogue_generator  # noqa: E402
+from ftp_server import BenchmarkFTPServer, parse_bytes  # noqa: E402
+
+FTP_USER = 'esprinet'
+FTP_PASSWORD = 'esprinet'
+MARGIN = 25.0
+BATCH_SIZE = 500
+
+
+class PhaseMeter(object):
+    """
+    Mide una fase: tiempo, pico de rss (muestreado en un hilo) y consultas
+    SQL, si hay un contador de consultas. Las fases sin base de datos no
+    llevan consultas en el resultado.
+    """
+
+    def __init__(self, name, query_counter=None, interval=0.02):
+        self.name = name
+        self.query_counter = query_counter
+        self.interval = interval
+        self.rows = 0
+        self.bytes = None
+        self.seconds = 0.0
+        self.peak_rss = None
+        self.queries = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record_rss()
+
+    def _record_rss(self):
+        rss = memory.memory_usage()[0]
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def __enter__(self):
+        self._record_rss()
+        self._queries_before = self.query_counter() if self.query_counter else None
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        self._record_rss()
+        if self.query_counter:
+            self.queries = self.query_counter() - self._queries_before
+
+    def result(self):
+        result = {
+            'seconds': round(self.seconds, 4),
+            'rows': self.rows,
+            'rows_per_s': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'peak_rss_mib': round(self.peak_rss / (1024.0 * 1024.0), 1) if self.peak_rss else None,
+        }
+        if self.query_counter:
+            result['queries'] = self.queries
+        if self.bytes is not None:
+            result['mib_per_s'] = round(self.bytes / (1024.0 * 1024.0) / self.seconds, 1) if self.seconds else None
+        return result
+
+
+def _iter_rows(path):
+    with open(path, 'rb') as catalogue:
+        for row in iter_array_items(iter_file_chunks(catalogue)):
+            yield row
+
+
+def _timed(meter, work):
+    """Suma a la fase sólo el tiempo de work, no el del parseo que la alimenta."""
+    started = time.perf_counter()
+    result = work()
+    meter.work_seconds = getattr(meter, 'work_seconds', 0.0) + time.perf_counter() - started
+    return result
+
+
+def run_offline_phases(path, ftp_server):
+    import ftplib
+
+    phases = {}
+
+    download_path = path + '.downloaded'
+    with PhaseMeter('download') as meter:
+        host, port = ftp_server.server_address[:2]
+        with ftplib.FTP() as ftp, open(download_path, 'wb') as target:
+            ftp.connect(host, port)
+            ftp.login(FTP_USER, FTP_PASSWORD)
+            ftp.retrbinary('RETR %s' % os.path.basename(path), target.write, blocksize=256 * 1024)
+        meter.bytes = os.path.getsize(download_path)
+    os.remove(download_path)
+
+    with PhaseMeter('parse') as parse:
+        for _row in _iter_rows(path):
+            parse.rows += 1
+    meter.rows = parse.rows
+    phases['download'] = meter.result()
+    phases['parse'] = parse.result()
+
+    with PhaseMeter('transform') as meter:
+        for chunk in iter_row_chunks(_iter_rows(path), BATCH_SIZE):
+            _timed(meter, lambda: transform_rows(chunk, MARGIN))
+            meter.rows += len(chunk)
+    meter.seconds = meter.work_seconds
+    phases['transform'] = meter.result()
+
+    with PhaseMeter('fingerprint') as meter:
+        for chunk in iter_row_chunks(_iter_rows(path), BATCH_SIZE):
+            _timed(meter, lambda: [row_fingerprint(row, MARGIN) for row in chunk])
+            meter.rows += len(chunk)
+    meter.seconds = meter.work_seconds
+    phases['fingerprint'] = meter.result()
+
+    with PhaseMeter('staging_csv') as meter:
+        for chunk in iter_row_chunks(_iter_rows(path), BATCH_SIZE):
+            _timed(meter, lambda: sum(len(block) for block in iter_copy_chunks(
+                staging_record(row, 1, MARGIN) for row in chunk)))
+            meter.rows += len(chunk)
+    meter.seconds = meter.work_seconds
+    phases['staging_csv'] = meter.result()
+
+    return phases
+
+
+def best_of(runs):
+    """
+    Mejor medida de cada fase entre varias repeticiones (la más rápida),
+    como timeit: el ruido de la máquina sólo puede hacerlas más lentas.
+    """
+    phases = {}
+    for run in runs:
+        for name, result in run.items():
+            if name not in phases or result['seconds'] < phases[name]['seconds']:
+                phases[name] = result
+    return phases
+
+
+class QueryProfile(CatalogueProfile):
+    """CatalogueProfile que cuenta además las consultas SQL de cada fase."""
+
+    def __init__(self, query_counter):
+        super().__init__()
+        self.queries = Counter()
+        self._query_counter = query_counter
+
+    def _resume(self, frame, now):
+        super()._resume(frame, now)
+        frame[2:] = [self._query_counter()]
+
+    def _pause(self, frame, now):
+        super()._pause(frame, now)
+        with self._lock:
+            self.queries[frame[0]] += self._query_counter() - frame[2]
+
+    def results(self, prefix, rows):
+        """Una entrada por fase de la importación, como las de PhaseMeter."""
+        return {
+            '%s.%s' % (prefix, name): {
+                'seconds': round(seconds, 4),
+                'rows': rows,
+                'rows_per_s': round(rows / seconds, 1) if seconds else None,
+                'peak_rss_mib': None,
+                'queries': self.queries[name],
+            }
+            for name, seconds in sorted(self.seconds.items())
+        }
+
+
+def run_odoo_phases(path, ftp_server, config_file, database):
+    """Descarga e importación reales con el ORM sobre una base de datos desechable."""
+    import odoo
+    from odoo import SUPERUSER_ID, api
+
+    odoo.tools.config.parse_config(['-c', config_file, '-d', database] if config_file else ['-d', database])
+    registry = odoo.registry(database)
+
+    def query_counter():
+        return getattr(odoo.sql_db, 'sql_counter', 0)
+
+    phases = {}
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        params = env['ir.config_parameter'].sudo()
+        params.set_param('esprinet_connector.ftp_host', ftp_server.address)
+        params.set_param('esprinet_connector.ftp_username', FTP_USER)
+        params.set_param('esprinet_connector.ftp_password', FTP_PASSWORD)
+        params.set_param('esprinet_connector.ftp_path', os.path.basename(path))
+        cr.commit()
+        service = env['esprinet.catalogue.service']
+
+        with PhaseMeter('odoo_download', query_counter) as meter:
+            local_path, remote = service._download_catalogue_file(force=True)
+            meter.bytes = os.path.getsize(local_path)
+        source = service._get_catalogue_source(local_path, remote)
+
+        for phase in ('odoo_import', 'odoo_reimport'):
+            profile = QueryProfile(query_counter)
+            with PhaseMeter(phase, query_counter) as import_meter:
+                service._process_catalogue_file(local_path, source, profile=profile)
+            run = env['esprinet.catalogue.run'].search([], limit=1)
+            import_meter.rows = run.processed
+            phases[phase] = import_meter.result()
+            phases.update(profile.results(phase, run.processed))
+            # La reimportación del mismo fichero debe empezar de cero
+            run.write({'source_key': '%s#%s' % (run.source_key, phase)})
+            cr.commit()
+        meter.rows = phases['odoo_import']['rows']
+        phases['odoo_download'] = meter.result()
+    return phases
+
+
+def _metadata():
+    return {
+        'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'codec': codec.CODEC_NAME,
+        'transform': TRANSFORM_BACKEND,
+    }
+
+
+def compare(phases, baseline, threshold):
+    """Regresiones frente a la referencia: menos filas/s, más memoria o más consultas."""
+    regressions = []
+    for name, current in sorted(phases.items()):
+        previous = baseline.get('phases', {}).get(name)
+        if not previous:
+            continue
+        if previous.get('rows_per_s') and current.get('rows_per_s') is not None \
+                and current['rows_per_s'] < previous['rows_per_s'] * (1 - threshold):
+            regressions.append('%s: %.0f rows/s (baseline %.0f)' % (name, current['rows_per_s'], previous['rows_per_s']))
+        if previous.get('peak_rss_mib') and current.get('peak_rss_mib') \
+                and current['peak_rss_mib'] > previous['peak_rss_mib'] * (1 + threshold):
+            regressions.append('%s: peak %.0f MiB (baseline %.0f)' % (name, current['peak_rss_mib'], previous['peak_rss_mib']))
+        # Sólo las fases con Odoo cuentan consultas
+        if previous.get('queries') is not None and current.get('queries') is not None \
+                and current['queries'] > previous['queries'] * (1 + threshold):
+            regressions.append('%s: %s queries (baseline %s)' % (name, current['queries'], previous['queries']))
+    return regressions
+
+
+def _delta(current, previous):
+    if current is None or not previous:
+        return ''
+    return '%+.0f%%' % (100.0 * (current - previous) / previous)
+
+
+def report(size, phases, baseline):
+    header = '%-24s %10s %12s %8s %11s %8s %9s' % ('phase', 'seconds', 'rows/s', 'vs base', 'peak MiB', 'vs base', 'queries')
+    print('\n== %s rows ==' % size)
+    print(header)
+    print('-' * len(header))
+    for name, result in phases.items():
+        previous = (baseline or {}).get('phases', {}).get(name, {})
+        print('%-24s %10.3f %12s %8s %11s %8s %9s' % (
+            name,
+            result['seconds'],
+            '%.0f' % result['rows_per_s'] if result['rows_per_s'] is not None else '-',
+            _delta(result['rows_per_s'], previous.get('rows_per_s')),
+            '%.1f' % result['peak_rss_mib'] if result['peak_rss_mib'] else '-',
+            _delta(result['peak_rss_mib'], previous.get('peak_rss_mib')),
+            result['queries'] if result.get('queries') is not None else '-',
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,10k', help='Tamaños separados por comas (1k, 10k, 100k, 1M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', help='Directorio para los catálogos generados (por defecto uno temporal)')
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR)
+    parser.add_argument('--save-baseline', action='store_true', help='Guarda las medidas como nueva referencia')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones de las fases sin Odoo; se guarda la más rápida')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Tolerancia antes de marcar una regresión (0.25 = 25%%)')
+    parser.add_argument('--rate', help='Velocidad máxima del FTP local en bytes/s (p. ej. 10M)')
+    parser.add_argument('-c', '--odoo-config', help='Fichero de configuración de Odoo para las fases con ORM')
+    parser.add_argument('-d', '--database', help='Base de datos DESECHABLE para las fases con ORM')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='esprinet_benchmark_')
+    os.makedirs(workdir, exist_ok=True)
+    ftp_server = BenchmarkFTPServer(
+        workdir, credentials=(FTP_USER, FTP_PASSWORD), rate=parse_bytes(args.rate)
+    ).start()
+    print('Codec: %s, transform: %s, FTP: %s' % (codec.CODEC_NAME, TRANSFORM_BACKEND, ftp_server.address))
+
+    regressions = []
+    try:
+        for size in args.sizes.split(','):
+            size = size.strip()
+            path = os.path.join(workdir, 'Catalogue_%s.json' % size)
+            if not os.path.exists(path):
+                with open(path, 'wb') as output:
+                    catalogue_generator.write_catalogue(output, catalogue_generator.parse_size(size), args.seed)
+
+            phases = best_of(run_offline_phases(path, ftp_server) for _index in range(max(args.repeat, 1)))
+            if args.database:
+                phases.update(run_odoo_phases(path, ftp_server, args.odoo_config, args.database))
+
+            baseline_path = os.path.join(args.baseline_dir, 'catalogue_%s.json' % size)
+            baseline = None
+            if os.path.exists(baseline_path):
+                with open(baseline_path) as baseline_file:
+                    baseline = json.load(baseline_file)
+            report(size, phases, baseline)
+
+            if baseline:
+                size_regressions = compare(phases, baseline, args.threshold)
+                for regression in size_regressions:
+                    print('REGRESSION %s' % regression)
+                regressions.extend(size_regressions)
+
+            if args.save_baseline:
+                os.makedirs(args.baseline_dir, exist_ok=True)
+                with open(baseline_path, 'w') as baseline_file:
+                    json.dump({
+                        'size': size,
+                        'rows': catalogue_generator.parse_size(size),
+                        'seed': args.seed,
+                        'file_bytes': os.path.getsize(path),
+                        'environment': _metadata(),
+                        'phases': phases,
+                    }, baseline_file, indent=2, sort_keys=True)
+                    baseline_file.write('\n')
+                print('Baseline saved to %s' % baseline_path)
+    finally:
+        ftp_server.stop()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
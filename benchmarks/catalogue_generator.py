@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de Catalogue.json sintéticos para medir la importación del
+catálogo sin el FTP de Esprinet.
+
+Uso:
+    python benchmarks/catalogue_generator.py 100k -o /tmp/Catalogue.json
+
+El tamaño admite sufijos k y M (1k, 10k, 100k, 1M). Las filas siguen la
+estructura del catálogo real con distribuciones parecidas: pocas
+agrupaciones con muchos productos y una cola larga, IVA casi siempre al
+21 %, precios log-normales, stock a cero en buena parte del catálogo y
+algunas filas defectuosas (sin SKU, sin EAN, EAN repetido o valores no
+numéricos). Con la misma semilla el fichero es idéntico byte a byte, así
+que las medidas de distintas versiones son comparables.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1M': 1000000}
+
+GROUPINGS = [
+    'Portátiles', 'Monitores', 'Impresoras', 'Consumibles', 'Accesorios', 'Almacenamiento',
+    'Redes', 'Componentes', 'Periféricos', 'Telefonía', 'Tablets', 'Audio', 'Cables',
+    'Software', 'Servidores', 'Sobremesa', 'Televisores', 'Gaming', 'Fotografía', 'SAI',
+] + ['Familia %02d' % index for index in range(60)]
+BRANDS = ['HP', 'Lenovo', 'Samsung', 'Logitech', 'Epson', 'Brother', 'Asus', 'Acer', 'Kingston', 'TP-Link']
+NOUNS = ['Portátil', 'Monitor', 'Ratón', 'Teclado', 'Cartucho', 'Disco SSD', 'Switch', 'Cable', 'Auricular', 'Funda']
+
+# Proporción de filas defectuosas de cada tipo
+MISSING_SKU_RATE = 0.002
+MISSING_EAN_RATE = 0.08
+DUPLICATE_EAN_RATE = 0.005
+INVALID_NUMBER_RATE = 0.001
+
+
+def parse_size(value):
+    if value in SIZES:
+        return SIZES[value]
+    multiplier = 1
+    if value[-1:] in ('k', 'K'):
+        multiplier, value = 1000, value[:-1]
+    elif value[-1:] == 'M':
+        multiplier, value = 1000000, value[:-1]
+    return int(float(value) * multiplier)
+
+
+def _ean(rnd):
+    digits = [rnd.randrange(10) for _index in range(12)]
+    check = (10 - sum(d * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10) % 10
+    return ''.join(map(str, digits)) + str(check)
+
+
+def iter_rows(rows, seed=42):
+    """Filas sintéticas del catálogo, deterministas para una semilla."""
+    rnd = random.Random(seed)
+    # Agrupaciones con distribución de Zipf: las primeras concentran el catálogo
+    weights = [1.0 / (rank + 1) for rank in range(len(GROUPINGS))]
+    groupings = rnd.choices(GROUPINGS, weights, k=min(rows, 4096))
+    previous_ean = None
+    for index in range(rows):
+        brand = BRANDS[index % len(BRANDS)]
+        price = round(math.exp(rnd.gauss(4.0, 1.3)), 2)
+        stock = 0 if rnd.random() < 0.35 else int(rnd.expovariate(1 / 40.0))
+        ean = _ean(rnd)
+        if previous_ean and rnd.random() < DUPLICATE_EAN_RATE:
+            ean = previous_ean
+        elif rnd.random() < MISSING_EAN_RATE:
+            ean = ''
+        previous_ean = ean or previous_ean
+        row = {
+            'SKU': '' if rnd.random() < MISSING_SKU_RATE else '%s%07d' % (brand[:2].upper(), index),
+            'PartNumber': '%s-%06X' % (brand[:3].upper(), rnd.randrange(16 ** 6)),
+            'EAN': ean,
+            'Description': '%s %s %s' % (rnd.choice(NOUNS), brand, rnd.randrange(100, 9999)),
+            'Grouping': groupings[index % len(groupings)],
+            'VatRate': rnd.choices([21.0, 10.0, 4.0], [0.94, 0.05, 0.01])[0],
+            'StandardDealerPrice': price,
+            'Fees': rnd.choices([0.0, 0.25, 1.5, 5.45], [0.8, 0.1, 0.05, 0.05])[0],
+            'StockQty': stock,
+            'Depth': round(rnd.uniform(1, 80), 1),
+            'Length': round(rnd.uniform(1, 80), 1),
+            'Height': round(rnd.uniform(1, 60), 1),
+            'GrossWeight': round(rnd.lognormvariate(0.5, 1.0), 2) if rnd.random() > 0.03 else '',
+        }
+        if rnd.random() < INVALID_NUMBER_RATE:
+            row[rnd.choice(['StandardDealerPrice', 'Fees', 'StockQty'])] = 'N/D'
+        yield row
+
+
+def write_catalogue(file_obj, rows, seed=42):
+    """Escribe el array JSON fila a fila, sin tenerlo entero en memoria."""
+    file_obj.write(b'[')
+    for index, row in enumerate(iter_rows(rows, seed)):
+        if index:
+            file_obj.write(b',\n')
+        file_obj.write(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+    file_obj.write(b']\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('rows', help='Número de filas: 1k, 10k, 100k, 1M o un entero')
+    parser.add_argument('-o', '--output', default='Catalogue.json', help="Fichero de salida ('-' para stdout)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.output == '-':
+        write_catalogue(sys.stdout.buffer, parse_size(args.rows), args.seed)
+        return
+    with open(args.output, 'wb') as output:
+        write_catalogue(output, parse_size(args.rows), args.seed)
+
+
+if __name__ == '__main__':
+    main()
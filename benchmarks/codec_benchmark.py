@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de los codecs JSON de services/codec.py.
+
+Uso:
+    python benchmarks/codec_benchmark.py [payload.json ...]
+
+Los payloads son respuestas grabadas de la API de Esprinet o un
+Catalogue.json descargado. Sin argumentos se usan payloads generados con la
+misma estructura (catálogo, precios y disponibilidad). Para cada payload y
+codec instalado se mide la decodificación y la codificación y, si el
+payload es un array, la decodificación en streaming de services/json_stream.py.
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'services')
+sys.path.insert(0, SERVICES_DIR)
+
+import codec  # noqa: E402
+import json_stream  # noqa: E402
+
+
+def _sample_payloads(rows=2000, seed=42):
+    rnd = random.Random(seed)
+    catalogue = [
+        {
+            'SKU': 'SKU%07d' % i,
+            'PartNumber': 'PN-%06X' % rnd.randrange(16 ** 6),
+            'EAN': '%013d' % rnd.randrange(10 ** 12, 10 ** 13),
+            'Description': 'Producto de prueba %d' % i,
+            'ExtendedDescription': 'Descripción extendida del producto %d ' % i * 4,
+            'Grouping': rnd.choice(['Portátiles', 'Monitores', 'Impresoras', 'Accesorios']),
+            'VatRate': rnd.choice([21.0, 10.0, 4.0]),
+            'StandardDealerPrice': round(rnd.uniform(1, 3000), 2),
+            'Fees': rnd.choice([0.0, 0.0, 0.25, 5.45]),
+            'StockQty': rnd.randrange(0, 500),
+            'Depth': round(rnd.uniform(1, 80), 1),
+            'Length': round(rnd.uniform(1, 80), 1),
+            'Height': round(rnd.uniform(1, 80), 1),
+            'GrossWeight': round(rnd.uniform(0.1, 40), 2),
+        }
+        for i in range(rows)
+    ]
+    pricing = {'productPricingByCode': {'sellPrice': 123.45, 'fees': 0.25, 'currency': 'EUR'}}
+    availability = {'productAvailabilityByCode': {'stock': 42, 'arrivalDate': None}}
+    return [
+        ('catalogue (%d rows)' % rows, codec.dumps(catalogue)),
+        ('products/pricing', codec.dumps(pricing)),
+        ('products/availability', codec.dumps(availability)),
+    ]
+
+
+def _best(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def run(payloads, number=None):
+    header = '%-28s %-12s %12s %12s' % ('payload', 'codec', 'loads MB/s', 'dumps MB/s')
+    print(header)
+    print('-' * len(header))
+    for name, body in payloads:
+        size_mb = len(body) / (1024.0 * 1024.0)
+        # Alrededor de 5 MB procesados por medida, al menos una iteración
+        iterations = number or max(1, int(5 / max(size_mb, 1e-6)))
+        obj = codec.loads(body)
+        for codec_name, loads, dumps in codec.available_codecs():
+            loads_time = _best(lambda: loads(body), iterations)
+            dumps_time = _best(lambda: dumps(obj), iterations)
+            print('%-28s %-12s %12.1f %12.1f' % (
+                name[:28], codec_name, size_mb / loads_time, size_mb / dumps_time
+            ))
+        if isinstance(obj, list):
+            # Decodificación elemento a elemento (siempre con json de stdlib)
+            stream_time = _best(
+                lambda: sum(1 for _item in json_stream.iter_array_items([body])),
+                iterations
+            )
+            print('%-28s %-12s %12.1f %12s' % (name[:28], 'json_stream', size_mb / stream_time, '-'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('payloads', nargs='*', help='Ficheros JSON grabados de la API o Catalogue.json')
+    parser.add_argument('--number', type=int, help='Iteraciones por medida')
+    args = parser.parse_args()
+
+    if args.payloads:
+        payloads = []
+        for path in args.payloads:
+            with open(path, 'rb') as f:
+                payloads.append((os.path.basename(path), f.read()))
+    else:
+        payloads = _sample_payloads()
+    print('Default codec: %s' % codec.CODEC_NAME)
+    run(payloads, args.number)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor FTP mínimo que sustituye al de Esprinet en las pruebas de
+rendimiento. Sirve en sólo lectura los ficheros de un directorio con los
+comandos que usa services/catalogue.py (USER, PASS, TYPE, SIZE, MDTM,
+PASV/EPSV, REST y RETR). No cifra ni comprueba rutas más allá del
+directorio servido: no debe exponerse fuera de la máquina.
+
+Uso:
+    python benchmarks/ftp_server.py /tmp/catalogue --port 2121 [--rate 5M] [--drop-after 50M]
+
+--rate limita la velocidad de cada descarga (bytes/s, admite k y M) y
+--drop-after corta la conexión de datos tras ese número de bytes, para
+medir las reanudaciones con REST.
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime, timezone
+
+BLOCK_SIZE = 64 * 1024
+
+
+def parse_bytes(value):
+    if value is None:
+        return None
+    units = {'k': 1024, 'K': 1024, 'M': 1024 * 1024, 'G': 1024 * 1024 * 1024}
+    if value[-1:] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+class _FTPHandler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.authenticated = False
+        self.username = None
+        self.rest = 0
+        self.passive = None
+
+    def reply(self, line):
+        self.wfile.write(('%s\r\n' % line).encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self):
+        self.reply('220 Esprinet benchmark FTP ready')
+        for raw in self.rfile:
+            line = raw.decode('utf-8', 'replace').strip()
+            if not line:
+                continue
+            command, _sep, argument = line.partition(' ')
+            command = command.upper()
+            if command not in ('USER', 'PASS', 'QUIT') and not self.authenticated:
+                self.reply('530 Not logged in')
+                continue
+            handler = getattr(self, 'ftp_' + command.lower(), None)
+            if handler is None:
+                self.reply('502 Command not implemented')
+                continue
+            if handler(argument) is False:
+                break
+        self._close_passive()
+
+    def _path(self, name):
+        path = os.path.realpath(os.path.join(self.server.root, name.lstrip('/')))
+        if not path.startswith(self.server.root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def ftp_user(self, argument):
+        self.username = argument
+        self.reply('331 Password required')
+
+    def ftp_pass(self, argument):
+        if self.server.credentials and self.server.credentials != (self.username, argument):
+            self.reply('530 Login incorrect')
+            return
+        self.authenticated = True
+        self.reply('230 Logged in')
+
+    def ftp_quit(self, argument):
+        self.reply('221 Bye')
+        return False
+
+    def ftp_syst(self, argument):
+        self.reply('215 UNIX Type: L8')
+
+    def ftp_feat(self, argument):
+        self.wfile.write(b'211-Features:\r\n SIZE\r\n MDTM\r\n REST STREAM\r\n EPSV\r\n')
+        self.reply('211 End')
+
+    def ftp_noop(self, argument):
+        self.reply('200 OK')
+
+    def ftp_pwd(self, argument):
+        self.reply('257 "/"')
+
+    def ftp_cwd(self, argument):
+        self.reply('250 OK')
+
+    def ftp_type(self, argument):
+        self.reply('200 Type set to %s' % argument)
+
+    def ftp_size(self, argument):
+        path = self._path(argument)
+        if path is None:
+            self.reply('550 No such file')
+            return
+        self.reply('213 %d' % os.path.getsize(path))
+
+    def ftp_mdtm(self, argument):
+        path = self._path(argument)
+        if path is None:
+            self.reply('550 No such file')
+            return
+        modified = datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+        self.reply('213 %s' % modified.strftime('%Y%m%d%H%M%S'))
+
+    def ftp_rest(self, argument):
+        try:
+            self.rest = int(argument)
+        except ValueError:
+            self.reply('501 Invalid offset')
+            return
+        self.reply('350 Restarting at %d' % self.rest)
+
+    def _open_passive(self):
+        self._close_passive()
+        self.passive = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.passive.bind((self.server.server_address[0], 0))
+        self.passive.listen(1)
+        return self.passive.getsockname()
+
+    def _close_passive(self):
+        if self.passive is not None:
+            self.passive.close()
+            self.passive = None
+
+    def ftp_pasv(self, argument):
+        host, port = self._open_passive()
+        self.reply('227 Entering Passive Mode (%s,%d,%d)' % (host.replace('.', ','), port >> 8, port & 0xFF))
+
+    def ftp_epsv(self, argument):
+        _host, port = self._open_passive()
+        self.reply('229 Entering Extended Passive Mode (|||%d|)' % port)
+
+    def ftp_retr(self, argument):
+        path = self._path(argument)
+        if path is None:
+            self.reply('550 No such file')
+            return
+        if self.passive is None:
+            self.reply('425 Use PASV or EPSV first')
+            return
+        offset, self.rest = self.rest, 0
+        self.reply('150 Opening BINARY mode data connection')
+        connection, _address = self.passive.accept()
+        self._close_passive()
+        sent = 0
+        started = time.monotonic()
+        rate = self.server.rate
+        drop_after = self.server.drop_after
+        try:
+            with open(path, 'rb') as source:
+                source.seek(offset)
+                while True:
+                    block = source.read(BLOCK_SIZE)
+                    if not block:
+                        break
+                    if drop_after is not None and sent + len(block) > drop_after:
+                        connection.sendall(block[:max(drop_after - sent, 0)])
+                        self.server.dropped += 1
+                        connection.close()
+                        self.reply('426 Connection closed; transfer aborted')
+                        return
+                    connection.sendall(block)
+                    sent += len(block)
+                    if rate:
+                        delay = sent / float(rate) - (time.monotonic() - started)
+                        if delay > 0:
+                            time.sleep(delay)
+        except OSError:
+            connection.close()
+            self.reply('426 Connection closed; transfer aborted')
+            return
+        connection.close()
+        self.server.bytes_sent += sent
+        self.reply('226 Transfer complete')
+
+
+class BenchmarkFTPServer(socketserver.ThreadingTCPServer):
+    """Servidor FTP de sólo lectura sobre un directorio."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, root, host='127.0.0.1', port=0, credentials=None, rate=None, drop_after=None):
+        super().__init__((host, port), _FTPHandler)
+        self.root = os.path.realpath(root)
+        self.credentials = credentials
+        self.rate = rate
+        self.drop_after = drop_after
+        self.bytes_sent = 0
+        self.dropped = 0
+        self._thread = None
+
+    @property
+    def address(self):
+        """host:port, en el formato del parámetro esprinet_connector.ftp_host."""
+        return '%s:%d' % self.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='benchmark-ftp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', help='Directorio con los ficheros a servir')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2121)
+    parser.add_argument('--user', default='esprinet')
+    parser.add_argument('--password', default='esprinet')
+    parser.add_argument('--rate', help='Velocidad máxima por descarga en bytes/s (p. ej. 5M)')
+    parser.add_argument('--drop-after', help='Corta cada descarga tras estos bytes (p. ej. 50M)')
+    args = parser.parse_args()
+
+    server = BenchmarkFTPServer(
+        args.root, args.host, args.port, (args.user, args.password),
+        parse_bytes(args.rate), parse_bytes(args.drop_after)
+    )
+    print('Serving %s on ftp://%s (user %s)' % (server.root, server.address, args.user))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
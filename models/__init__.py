@@ -4,3 +4,10 @@ from . import res_config_settings
 from . import product_template
 from . import product_product
 from . import sale_order
+from . import esprinet_auth_token
+from . import esprinet_rate_bucket
+from . import esprinet_circuit_breaker
+from . import esprinet_response_cache
+from . import esprinet_catalogue_run
+from . import esprinet_catalogue_staging
+from . import esprinet_reprice_job
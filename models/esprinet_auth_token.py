@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import datetime, timezone
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+class EsprinetAuthToken(models.Model):
+    """
+    Almacén de tokens de autenticación de la API de Esprinet.
+
+    Sustituye a los parámetros esprinet_connector.auth_token y
+    esprinet_connector.auth_token_expiry: escribir en ir.config_parameter
+    vacía el ormcache de todos los workers, mientras que este modelo es una
+    tabla normal que no toca la caché del registro.
+    """
+    _name = 'esprinet.auth.token'
+    _description = 'Esprinet Auth Token'
+    _order = 'write_date desc'
+
+    key = fields.Char(string='Clave', required=True, index=True, readonly=True,
+        help='Huella de la URL base y las credenciales a las que pertenece el token.')
+    base_url = fields.Char(string='URL API', readonly=True)
+    username = fields.Char(string='Usuario', readonly=True)
+    token = fields.Char(string='Token', readonly=True, groups='base.group_system')
+    expires_at = fields.Datetime(string='Expira', readonly=True)
+    login_count = fields.Integer(string='Logins', readonly=True, default=0)
+    last_login = fields.Datetime(string='Último login', readonly=True)
+    invalidation_count = fields.Integer(string='Invalidaciones', readonly=True, default=0,
+        help='Veces que la API ha rechazado el token con 401/403.')
+    last_invalidation = fields.Datetime(string='Última invalidación', readonly=True)
+    last_invalidation_status = fields.Integer(string='Último código de invalidación', readonly=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'Only one token can be stored per API URL and credentials.'),
+    ]
+
+    @api.model
+    def _get_record(self, key):
+        return self.sudo().search([('key', '=', key)], limit=1)
+
+    @api.model
+    def _get_stored_token(self, key):
+        """
+        :return: (token, timestamp de expiración) guardados para la clave, o
+            (None, None) si no hay token.
+        """
+        record = self._get_record(key)
+        if not record or not record.token:
+            return None, None
+        expires_at = record.expires_at and record.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        return record.token, expires_at
+
+    @api.model
+    def _store_token(self, key, token, expires_at, base_url=None, username=None):
+        """
+        Guarda el token recién obtenido y cuenta el login.
+        """
+        vals = {
+            'token': token,
+            'expires_at': datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None),
+            'last_login': fields.Datetime.now(),
+            'base_url': base_url,
+            'username': username,
+        }
+        record = self._get_record(key)
+        if record:
+            vals['login_count'] = record.login_count + 1
+            record.write(vals)
+        else:
+            vals.update(key=key, login_count=1)
+            record = self.sudo().create(vals)
+        return record
+
+    @api.model
+    def _invalidate_token(self, key, status_code=None):
+        """
+        Descarta el token guardado tras un 401/403 e incrementa el contador
+        de invalidaciones. El incremento se hace en SQL para no perder
+        cuentas cuando varios workers invalidan a la vez.
+        """
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            UPDATE esprinet_auth_token
+               SET token = NULL,
+                   invalidation_count = invalidation_count + 1,
+                   last_invalidation = (now() at time zone 'UTC'),
+                   last_invalidation_status = %s
+             WHERE key = %s
+            """,
+            (status_code, key)
+        )
+        self.invalidate_model()
+        if not self.env.cr.rowcount:
+            _logger.debug("No stored Esprinet token to invalidate for key %s", key[:8])
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+import base64
+
+from odoo import models, fields, api
+
+# Contadores de una importación que se guardan en cada checkpoint
+CATALOGUE_RUN_COUNTERS = ('processed', 'created', 'updated', 'unchanged', 'skipped', 'error')
+
+# Fases del perfil de la importación con campo propio en la ejecución
+CATALOGUE_PROFILE_PHASES = ('download', 'parse', 'staging', 'partition', 'transform', 'match', 'create', 'update',
+                            'commit')
+
+
+class EsprinetCatalogueRun(models.Model):
+    """
+    Ejecución de la importación del catálogo. Identifica el fichero de
+    origen y agrupa los checkpoints de sus particiones, de modo que si el
+    worker muere a mitad (timeout del cron, falta de memoria, despliegue)
+    la siguiente ejecución con el mismo fichero continúa desde el último
+    lote confirmado en vez de empezar de cero.
+    """
+    _name = 'esprinet.catalogue.run'
+    _description = 'Esprinet Catalogue Import Run'
+    _order = 'id desc'
+
+    source_key = fields.Char(string='Identidad del fichero', required=True, index=True, readonly=True,
+        help='Ruta, tamaño y fecha de modificación del fichero en el FTP o, si no se conocen, huella de su contenido.')
+    file_name = fields.Char(string='Fichero', readonly=True)
+    file_size = fields.Integer(string='Tamaño (bytes)', readonly=True)
+    file_modified = fields.Datetime(string='Modificado en origen', readonly=True)
+    state = fields.Selection([
+        ('running', 'En curso'),
+        ('done', 'Terminada'),
+        ('failed', 'Fallida'),
+        ('cancelled', 'Descartada'),
+    ], string='Estado', required=True, default='running', readonly=True)
+    partitions = fields.Integer(string='Particiones', default=1, readonly=True)
+    engine = fields.Selection([
+        ('orm', 'ORM'),
+        ('staging', 'Staging SQL'),
+    ], string='Motor', default='orm', readonly=True)
+    staging_loaded = fields.Boolean(string='Staging cargado', readonly=True,
+        help='El fichero ya está cargado y clasificado en la tabla de staging: al reanudar no se vuelve a cargar.')
+    started_at = fields.Datetime(string='Inicio', default=fields.Datetime.now, readonly=True)
+    finished_at = fields.Datetime(string='Fin', readonly=True)
+    attempts = fields.Integer(string='Intentos', default=1, readonly=True,
+        help='Veces que se ha lanzado la importación de este fichero, contando las reanudaciones.')
+    checkpoint_ids = fields.One2many('esprinet.catalogue.checkpoint', 'run_id', string='Checkpoints', readonly=True)
+    processed = fields.Integer(string='Procesados', readonly=True)
+    created = fields.Integer(string='Creados', readonly=True)
+    updated = fields.Integer(string='Actualizados', readonly=True)
+    unchanged = fields.Integer(string='Sin cambios', readonly=True)
+    skipped = fields.Integer(string='Omitidos', readonly=True)
+    error = fields.Integer(string='Errores', readonly=True)
+    vanished = fields.Integer(string='Retirados', readonly=True,
+        help='Productos importados antes que ya no aparecen en el catálogo (sólo con el motor de staging).')
+    last_error = fields.Char(string='Último error', readonly=True)
+
+    # Perfil del último intento (ver CatalogueProfile)
+    duration_seconds = fields.Float(string='Duración (s)', readonly=True)
+    rows_per_second = fields.Float(string='Filas/s', readonly=True,
+        help='Filas leídas del fichero por segundo de duración del último intento.')
+    download_bytes = fields.Float(string='Descargado (bytes)', readonly=True,
+        help='Bytes recibidos del FTP en el último intento; 0 si se usó la copia en caché.')
+    download_seconds = fields.Float(string='Descarga (s)', readonly=True)
+    parse_seconds = fields.Float(string='Lectura y parseo (s)', readonly=True,
+        help='Incluye la espera a la descarga cuando se importa durante la descarga.')
+    staging_seconds = fields.Float(string='Staging (s)', readonly=True)
+    partition_seconds = fields.Float(string='Reparto en particiones (s)', readonly=True)
+    transform_seconds = fields.Float(string='Cálculo de valores (s)', readonly=True)
+    match_seconds = fields.Float(string='Búsqueda y comparación (s)', readonly=True)
+    create_seconds = fields.Float(string='Altas (s)', readonly=True)
+    update_seconds = fields.Float(string='Actualizaciones (s)', readonly=True)
+    commit_seconds = fields.Float(string='Commits (s)', readonly=True)
+    error_types = fields.Text(string='Errores por tipo', readonly=True)
+    profile_phase = fields.Char(string='Fase perfilada', readonly=True,
+        help='Fase más lenta del último intento, perfilada con cProfile si está activado en los ajustes.')
+    profile_stats = fields.Text(string='Informe de cProfile', readonly=True)
+    profile_dump = fields.Binary(string='Volcado de cProfile', attachment=True, readonly=True,
+        help='Se abre con pstats, snakeviz o cualquier visor de ficheros .prof.')
+    profile_dump_name = fields.Char(string='Nombre del volcado', readonly=True)
+
+    @api.model
+    def _start_run(self, source, partitions, engine='orm'):
+        """
+        Reanuda la última ejecución sin terminar del mismo fichero o crea
+        una nueva. Las ejecuciones sin terminar de otros ficheros se
+        descartan: sus checkpoints ya no sirven.
+
+        :param source: dict con source_key, file_name, file_size y
+            file_modified.
+        :return: la ejecución, con un checkpoint por partición.
+        """
+        unfinished = self.sudo().search([('state', 'in', ('running', 'failed'))])
+        run = unfinished.filtered(lambda r: r.source_key == source['source_key'])[:1]
+        (unfinished - run).write({'state': 'cancelled', 'finished_at': fields.Datetime.now()})
+        if run:
+            run.write({'state': 'running', 'attempts': run.attempts + 1, 'last_error': False})
+            return run
+        run = self.sudo().create(dict(source, partitions=partitions, engine=engine))
+        self.env['esprinet.catalogue.checkpoint'].sudo().create([
+            {'run_id': run.id, 'partition': partition}
+            for partition in range(partitions)
+        ])
+        return run
+
+    @api.model
+    def _is_imported(self, source_key):
+        """True si ya hay una importación terminada de ese fichero."""
+        return bool(source_key) and bool(self.sudo().search_count([
+            ('source_key', '=', source_key),
+            ('state', '=', 'done'),
+        ], limit=1))
+
+    def _get_checkpoint(self, partition):
+        self.ensure_one()
+        return self.checkpoint_ids.filtered(lambda c: c.partition == partition)[:1]
+
+    def _finish_run(self, state='done', error=None, extra=None):
+        """
+        Suma los contadores de los checkpoints y cierra la ejecución.
+
+        :param extra: contadores de filas resueltas fuera de los checkpoints
+            (p. ej. las que el staging ya clasifica como sin cambios).
+        """
+        extra = extra or {}
+        for run in self:
+            vals = {
+                counter: sum(run.checkpoint_ids.mapped(counter)) + extra.get(counter, 0)
+                for counter in CATALOGUE_RUN_COUNTERS
+            }
+            vals.update(state=state, finished_at=fields.Datetime.now())
+            if error:
+                vals['last_error'] = str(error)[:255]
+            run.write(vals)
+
+    def _save_profile(self, summary, dump=None):
+        """
+        Guarda el perfil del último intento; los de intentos anteriores
+        se sobrescriben.
+
+        :param summary: CatalogueProfile.summary()
+        :param dump: CatalogueProfile.slowest_dump()
+        """
+        self.ensure_one()
+        seconds = summary['seconds']
+        vals = {'%s_seconds' % phase: seconds.get(phase, 0.0) for phase in CATALOGUE_PROFILE_PHASES}
+        vals.update(
+            duration_seconds=summary['duration'],
+            rows_per_second=summary['rows_per_second'],
+            download_bytes=summary['download_bytes'],
+            error_types='\n'.join(
+                '%s: %s' % (error_type, count)
+                for error_type, count in sorted(summary['errors'].items(), key=lambda item: -item[1])
+            ) or False,
+            profile_phase=False,
+            profile_stats=False,
+            profile_dump=False,
+            profile_dump_name=False,
+        )
+        if dump:
+            phase, stats, data = dump
+            vals.update(
+                profile_phase=phase,
+                profile_stats=stats,
+                profile_dump=base64.b64encode(data),
+                profile_dump_name='catalogue_run_%s_%s.prof' % (self.id, phase),
+            )
+        self.sudo().write(vals)
+
+
+class EsprinetCatalogueCheckpoint(models.Model):
+    """
+    Último lote confirmado de una partición de la importación. Se escribe
+    en la misma transacción que el lote, así que nunca adelanta ni atrasa
+    a los productos realmente guardados. Cada partición tiene su propia
+    fila para que los workers en paralelo no se bloqueen entre sí.
+    """
+    _name = 'esprinet.catalogue.checkpoint'
+    _description = 'Esprinet Catalogue Import Checkpoint'
+    _order = 'run_id desc, partition'
+
+    run_id = fields.Many2one('esprinet.catalogue.run', string='Ejecución', required=True,
+        ondelete='cascade', index=True, readonly=True)
+    partition = fields.Integer(string='Partición', readonly=True)
+    done = fields.Boolean(string='Terminada', readonly=True)
+    last_sku = fields.Char(string='Último SKU confirmado', readonly=True)
+    processed = fields.Integer(string='Filas confirmadas', readonly=True,
+        help='Filas de la partición ya procesadas y confirmadas: al reanudar se salta este número de filas.')
+    created = fields.Integer(string='Creados', readonly=True)
+    updated = fields.Integer(string='Actualizados', readonly=True)
+    unchanged = fields.Integer(string='Sin cambios', readonly=True)
+    skipped = fields.Integer(string='Omitidos', readonly=True)
+    error = fields.Integer(string='Errores', readonly=True)
+
+    _sql_constraints = [
+        ('run_partition_unique', 'unique(run_id, partition)', 'Only one checkpoint can exist per run partition.'),
+    ]
+
+    def _get_counters(self):
+        self.ensure_one()
+        return {counter: self[counter] for counter in CATALOGUE_RUN_COUNTERS}
+
+    def _save(self, counters, last_sku=None, done=False):
+        """Guarda el progreso; se confirma con el commit del lote."""
+        vals = {counter: counters.get(counter, 0) for counter in CATALOGUE_RUN_COUNTERS}
+        vals['done'] = done
+        if last_sku:
+            vals['last_sku'] = last_sku
+        self.sudo().write(vals)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields
+
+
+class EsprinetCatalogueStaging(models.Model):
+    """
+    Última versión de Catalogue.json cargada con COPY por el motor de
+    importación 'staging'. Guarda las columnas del feed tal como llegan y la
+    clasificación de cada fila frente a los productos existentes, así que
+    sirve también para informes sobre el catálogo del proveedor sin volver
+    a leer el fichero. Se vacía en cada importación.
+    """
+    _name = 'esprinet.catalogue.staging'
+    _description = 'Esprinet Catalogue Staging Row'
+    _order = 'id'
+    _log_access = False
+
+    run_id = fields.Many2one('esprinet.catalogue.run', string='Ejecución', ondelete='set null', readonly=True)
+    sku = fields.Char(string='SKU', index=True, readonly=True)
+    part_number = fields.Char(string='Part number', readonly=True)
+    default_code = fields.Char(string='Referencia', index=True, readonly=True)
+    ean = fields.Char(string='EAN', readonly=True)
+    description = fields.Char(string='Descripción', readonly=True)
+    grouping = fields.Char(string='Agrupación', readonly=True)
+    vat_rate = fields.Float(string='IVA (%)', readonly=True)
+    dealer_price = fields.Float(string='Precio distribuidor', readonly=True)
+    fees = fields.Float(string='Tasas', readonly=True)
+    stock_qty = fields.Float(string='Stock', readonly=True)
+    depth = fields.Float(string='Fondo', readonly=True)
+    length = fields.Float(string='Largo', readonly=True)
+    height = fields.Float(string='Alto', readonly=True)
+    gross_weight = fields.Float(string='Peso bruto', readonly=True)
+    fingerprint = fields.Char(string='Huella', readonly=True)
+    payload = fields.Text(string='Fila original', readonly=True)
+    product_id = fields.Many2one('product.product', string='Producto', ondelete='set null', readonly=True)
+    delta = fields.Selection([
+        ('new', 'Nuevo'),
+        ('changed', 'Modificado'),
+        ('unchanged', 'Sin cambios'),
+        ('duplicate', 'Duplicado'),
+        ('invalid', 'Sin SKU'),
+    ], string='Cambio', index=True, readonly=True)
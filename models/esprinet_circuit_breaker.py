@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+class EsprinetCircuitBreaker(models.Model):
+    """
+    Último estado conocido del circuit breaker de cada familia de endpoints
+    de la API de Esprinet. Cada worker mantiene su propio circuito en
+    memoria y sólo escribe aquí cuando cambia de estado, para que los
+    operadores vean qué partes de la API están fallando.
+    """
+    _name = 'esprinet.circuit.breaker'
+    _description = 'Esprinet API Circuit Breaker'
+    _order = 'name'
+
+    name = fields.Char(string='Grupo de endpoints', required=True, readonly=True)
+    state = fields.Selection([
+        ('closed', 'Cerrado'),
+        ('open', 'Abierto'),
+        ('half_open', 'Semiabierto'),
+    ], string='Estado', required=True, default='closed', readonly=True)
+    failure_count = fields.Integer(string='Fallos consecutivos', readonly=True)
+    trip_count = fields.Integer(string='Aperturas', readonly=True,
+        help='Veces que el circuito se ha abierto.')
+    last_error = fields.Char(string='Último error', readonly=True)
+    last_change = fields.Datetime(string='Último cambio', readonly=True)
+    worker_pid = fields.Integer(string='PID del worker', readonly=True,
+        help='Proceso que informó del último cambio de estado.')
+
+    _sql_constraints = [
+        ('name_unique', 'unique(name)', 'Only one circuit breaker record can exist per endpoint group.'),
+    ]
+
+    @api.model
+    def _record_state(self, name, state, failure_count, last_error, worker_pid):
+        record = self.sudo().search([('name', '=', name)], limit=1)
+        vals = {
+            'state': state,
+            'failure_count': failure_count,
+            'last_error': last_error,
+            'last_change': fields.Datetime.now(),
+            'worker_pid': worker_pid,
+        }
+        if not record:
+            vals.update(name=name, trip_count=0)
+            record = self.sudo().create(vals)
+        if state == 'open':
+            vals['trip_count'] = record.trip_count + 1
+        record.write(vals)
+        return record
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+class EsprinetRateBucket(models.Model):
+    """
+    Token bucket compartido por todos los workers para no superar la cuota
+    de peticiones de la API de Esprinet. La recarga se calcula en SQL en la
+    misma sentencia que consume los tokens, así que no hace falta un proceso
+    que la alimente.
+    """
+    _name = 'esprinet.rate.bucket'
+    _description = 'Esprinet API Rate Limit Bucket'
+
+    key = fields.Char(string='Clave', required=True, index=True, readonly=True)
+    tokens = fields.Float(string='Tokens disponibles', readonly=True)
+    refilled_at = fields.Float(string='Última recarga (epoch)', readonly=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'Only one rate limit bucket can exist per key.'),
+    ]
+
+    @api.model
+    def _take_tokens(self, key, count, rate, burst):
+        """
+        Recarga el bucket según el tiempo transcurrido y consume hasta
+        count tokens de forma atómica.
+
+        :param rate: tokens por segundo.
+        :param burst: capacidad máxima del bucket.
+        :return: (tokens concedidos, segundos a esperar si no hay ninguno)
+        """
+        query = """
+            WITH bucket AS (
+                SELECT id,
+                       LEAST(%(burst)s, tokens + GREATEST(
+                           0, extract(epoch FROM clock_timestamp()) - refilled_at
+                       ) * %(rate)s) AS available
+                  FROM esprinet_rate_bucket
+                 WHERE key = %(key)s
+                   FOR UPDATE
+            )
+            UPDATE esprinet_rate_bucket b
+               SET tokens = bucket.available - LEAST(floor(bucket.available), %(count)s),
+                   refilled_at = extract(epoch FROM clock_timestamp())
+              FROM bucket
+             WHERE b.id = bucket.id
+         RETURNING LEAST(floor(bucket.available), %(count)s), bucket.available
+        """
+        query_params = {'key': key, 'count': count, 'rate': rate, 'burst': burst}
+        self.env.cr.execute(query, query_params)
+        row = self.env.cr.fetchone()
+        if row is None:
+            self.env.cr.execute(
+                """
+                INSERT INTO esprinet_rate_bucket (key, tokens, refilled_at)
+                VALUES (%s, %s, extract(epoch FROM clock_timestamp()))
+                ON CONFLICT (key) DO NOTHING
+                """,
+                (key, burst)
+            )
+            self.env.cr.execute(query, query_params)
+            row = self.env.cr.fetchone()
+
+        granted, available = int(row[0]), row[1]
+        if granted:
+            return granted, 0.0
+        return 0, max(0.05, (1 - available) / rate)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from odoo import models, fields, api
+from odoo.tools import float_round
+
+_logger = logging.getLogger(__name__)
+
+# Plantillas por lote: cada lote se recalcula con un UPDATE y se confirma
+REPRICE_BATCH_SIZE = 1000
+# Segundos de trabajo por ejecución del cron antes de ceder el worker; el
+# resto de lotes se procesan en la siguiente, que se lanza enseguida
+REPRICE_TIME_LIMIT = 240
+
+
+class EsprinetRepriceJob(models.Model):
+    """
+    Recálculo del precio de venta (list_price) de todas las plantillas
+    suministradas por Esprinet a partir de su coste y del margen de venta.
+    Se crea al cambiar el margen en los ajustes y lo procesa un cron por
+    lotes de REPRICE_BATCH_SIZE plantillas, guardando el avance en el mismo
+    commit que cada lote: si el worker se corta, continúa donde lo dejó.
+    """
+    _name = 'esprinet.reprice.job'
+    _description = 'Esprinet Sale Price Recalculation'
+    _order = 'id desc'
+
+    margin = fields.Float(string='Margen (%)', required=True, readonly=True)
+    previous_margin = fields.Float(string='Margen anterior (%)', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+        ('cancelled', 'Descartado'),
+    ], string='Estado', required=True, default='pending', readonly=True)
+    total = fields.Integer(string='Plantillas', readonly=True)
+    processed = fields.Integer(string='Revisadas', readonly=True)
+    changed = fields.Integer(string='Precios cambiados', readonly=True)
+    last_template_id = fields.Integer(string='Última plantilla revisada', readonly=True,
+        help='Las plantillas se recorren por id: al reanudar se sigue a partir de esta.')
+    progress = fields.Float(string='Progreso (%)', compute='_compute_progress')
+    started_at = fields.Datetime(string='Inicio', readonly=True)
+    finished_at = fields.Datetime(string='Fin', readonly=True)
+    last_error = fields.Char(string='Último error', readonly=True)
+
+    @api.depends('total', 'processed')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = 100.0 * job.processed / job.total if job.total else 0.0
+
+    @api.model
+    def _enqueue(self, margin, previous_margin=None):
+        """
+        Crea el recálculo con el nuevo margen y lanza el cron. Los que aún
+        no habían terminado se descartan: el nuevo revisa todas las
+        plantillas de todos modos.
+        """
+        self.sudo().search([('state', 'in', ('pending', 'running'))]).write({
+            'state': 'cancelled',
+            'finished_at': fields.Datetime.now(),
+        })
+        job = self.sudo().create({'margin': margin, 'previous_margin': previous_margin})
+        cron = self.env.ref('esprinet_connector.ir_cron_esprinet_reprice', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return job
+
+    @api.model
+    def _cron_run_pending_jobs(self):
+        job = self.sudo().search([('state', 'in', ('pending', 'running'))], order='id', limit=1)
+        if job:
+            job._run()
+
+    def _get_template_batch(self, supplier_id):
+        """Siguiente lote de ids de plantillas de Esprinet, en orden de id."""
+        self.env.cr.execute("""
+            SELECT DISTINCT s.product_tmpl_id
+              FROM product_supplierinfo s
+             WHERE s.partner_id = %s AND s.product_tmpl_id > %s
+             ORDER BY s.product_tmpl_id
+             LIMIT %s
+        """, (supplier_id, self.last_template_id, REPRICE_BATCH_SIZE))
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def _reprice_batch(self, template_ids, digits):
+        """
+        Recalcula list_price de un lote con un único UPDATE y devuelve
+        cuántos precios han cambiado. El coste depende de la compañía, así
+        que se lee con el ORM (una consulta por lote) y se envía el nuevo
+        precio ya redondeado como lo guardaría write().
+        """
+        Template = self.env['product.template'].with_context(active_test=False)
+        factor = 1 + self.margin / 100.0
+        prices = [
+            (template.id, float_round(template.standard_price * factor, precision_digits=digits))
+            for template in Template.browse(template_ids)
+        ]
+        if not prices:
+            return 0
+        self.env.cr.execute("""
+            UPDATE product_template AS t
+               SET list_price = v.price, write_date = now() AT TIME ZONE 'UTC', write_uid = %s
+              FROM (VALUES {}) AS v(id, price)
+             WHERE t.id = v.id AND t.list_price IS DISTINCT FROM v.price
+         RETURNING t.id
+        """.format(', '.join(['(%s, %s::numeric)'] * len(prices))),
+            [self.env.uid] + [value for price in prices for value in price])
+        changed_ids = [row[0] for row in self.env.cr.fetchall()]
+        Template.browse(template_ids).invalidate_recordset(['list_price', 'write_date', 'write_uid'])
+        return len(changed_ids)
+
+    def _run(self):
+        """
+        Procesa lotes hasta terminar o agotar REPRICE_TIME_LIMIT; en ese
+        caso vuelve a lanzar el cron para seguir en otra ejecución. Tras
+        cada commit se vuelve a leer el estado y se para si el trabajo ya
+        no está en curso (por ejemplo, cancelado por otro cambio de margen).
+        """
+        self.ensure_one()
+        supplier = self.env['res.partner'].search([('ref', '=', 'ESPRINET_SUPPLIER')], limit=1)
+        if not supplier:
+            self.write({'state': 'failed', 'last_error': 'Esprinet supplier not found',
+                        'finished_at': fields.Datetime.now()})
+            return
+
+        if self.state == 'pending':
+            self.env.cr.execute("""
+                SELECT COUNT(DISTINCT product_tmpl_id) FROM product_supplierinfo WHERE partner_id = %s
+            """, (supplier.id,))
+            self.write({'state': 'running', 'started_at': fields.Datetime.now(),
+                        'total': self.env.cr.fetchone()[0]})
+            self.env.cr.commit()
+
+        digits = self.env['decimal.precision'].precision_get('Product Price')
+        started = time.monotonic()
+        try:
+            while True:
+                self.invalidate_recordset(['state'])
+                if self.state != 'running':
+                    _logger.info("Sale price recalculation %s stopped: job is %s", self.id, self.state)
+                    return
+                template_ids = self._get_template_batch(supplier.id)
+                if not template_ids:
+                    self.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                    self.env.cr.commit()
+                    _logger.info(
+                        "Sale prices recalculated with a %s%% margin: %s of %s templates changed",
+                        self.margin, self.changed, self.processed
+                    )
+                    return
+                changed = self._reprice_batch(template_ids, digits)
+                self.write({
+                    'processed': self.processed + len(template_ids),
+                    'changed': self.changed + changed,
+                    'last_template_id': template_ids[-1],
+                })
+                self.env.cr.commit()
+                if time.monotonic() - started > REPRICE_TIME_LIMIT:
+                    self.env.ref('esprinet_connector.ir_cron_esprinet_reprice')._trigger()
+                    return
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.error("Error recalculating Esprinet sale prices: %s", str(e))
+            self.invalidate_recordset(['state'])
+            if self.state not in ('pending', 'running'):
+                return
+            self.write({'state': 'failed', 'last_error': str(e)[:255], 'finished_at': fields.Datetime.now()})
+            self.env.cr.commit()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models, fields, api
+
+class EsprinetResponseCache(models.Model):
+    """
+    Backend compartido (opcional) de la caché de respuestas de la API, para
+    que lo que descarga un worker lo aprovechen los demás. Las lecturas y
+    escrituras van por SQL para no pasar por la caché del ORM.
+    """
+    _name = 'esprinet.response.cache'
+    _description = 'Esprinet API Response Cache'
+
+    key = fields.Char(string='Clave', required=True, index=True, readonly=True)
+    endpoint = fields.Char(string='Endpoint', readonly=True)
+    body = fields.Binary(string='Respuesta', attachment=False, readonly=True)
+    etag = fields.Char(string='ETag', readonly=True)
+    last_modified = fields.Char(string='Last-Modified', readonly=True)
+    expires_at = fields.Float(string='Caduca (epoch)', readonly=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'Only one cached response can exist per key.'),
+    ]
+
+    @api.model
+    def _get_entry(self, key):
+        """
+        :return: (body, expires_at, etag, last_modified) o None.
+        """
+        self.env.cr.execute(
+            "SELECT body, expires_at, etag, last_modified FROM esprinet_response_cache WHERE key = %s",
+            (key,)
+        )
+        row = self.env.cr.fetchone()
+        if row is None:
+            return None
+        body = row[0]
+        return (bytes(body) if body is not None else b'',) + tuple(row[1:])
+
+    @api.model
+    def _put_entry(self, key, endpoint, body, expires_at, etag=None, last_modified=None):
+        self.env.cr.execute(
+            """
+            INSERT INTO esprinet_response_cache (key, endpoint, body, expires_at, etag, last_modified)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (key) DO UPDATE
+               SET endpoint = EXCLUDED.endpoint,
+                   body = EXCLUDED.body,
+                   expires_at = EXCLUDED.expires_at,
+                   etag = EXCLUDED.etag,
+                   last_modified = EXCLUDED.last_modified
+            """,
+            (key, endpoint, body, expires_at, etag, last_modified)
+        )
@@ -1,10 +1,18 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models
+from odoo import models, fields
 
 class ProductProduct(models.Model):
     _inherit = 'product.product'
 
+    esprinet_catalogue_fingerprint = fields.Char(
+        string='Huella del catálogo Esprinet',
+        help='Huella de la fila de Catalogue.json importada por última vez; '
+             'si no cambia, la importación no toca el producto.',
+        copy=False,
+        readonly=True,
+    )
+
     def _is_esprinet_product(self):
         """
         Check if this product is supplied by Esprinet
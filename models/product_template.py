@@ -6,6 +6,10 @@ from odoo.exceptions import UserError
 
 _logger = logging.getLogger(__name__)
 
+# Margen de venta (%) cuando no se ha configurado ninguno
+ESPRINET_DEFAULT_SALE_MARGIN = 25.0
+
+
 class ProductTemplate(models.Model):
     _inherit = 'product.template'
 
@@ -34,7 +38,8 @@ class ProductTemplate(models.Model):
         Pasos realizados:
             1. Recupera hasta 100 productos para actualizar.
             2. Para cada producto (del modelo `product.template`):
-            - Obtiene precios y disponibilidad desde la API de Esprinet usando el SKU del producto.
+            - Obtiene precios y disponibilidad desde la API de Esprinet usando el SKU del producto
+              (las peticiones de todo el lote se lanzan en paralelo antes de recorrerlo).
             - Actualiza el precio de coste, el precio de venta (con el margen configurado) y la cantidad de stock del proveedor si se detectan cambios.
             - Registra advertencias para datos faltantes o inválidos.
             3. Registra el número de productos procesados.
@@ -44,7 +49,7 @@ class ProductTemplate(models.Model):
 
         Notas:
             - La variable `product` en el bucle se refiere a un registro del modelo `product.template`.
-            - Utiliza el parámetro de configuración 'esprinet_connector.margin' para calcular el precio de venta.
+            - Calcula el precio de venta con el margen de _get_esprinet_sale_margin.
             - Maneja y registra excepciones para errores de la API y problemas inesperados.
         """
         _logger.info("Starting Esprinet products synchronization cron job.")
@@ -61,16 +66,19 @@ class ProductTemplate(models.Model):
             _logger.info("No se devolvieron productos desde la API de Esprinet.")
             return
 
-        margin = self.env['ir.config_parameter'].sudo().get_param(
-            'esprinet_connector.margin',
-            default=25.0
-        )
+        margin = self._get_esprinet_sale_margin()
+        # Precios y disponibilidad se piden en paralelo para todo el lote
+        esprinet_products = products_list.filtered(lambda p: p._is_esprinet_product())
+        skus = [sku for sku in esprinet_products.mapped('default_code') if sku]
+        products_service = self.env['esprinet.api.products.service']
+        pricing_by_sku, availability_by_sku = products_service.get_pricing_and_availability_batch(skus)
+
         processed_count = 0
         # product: product.template
         for product in products_list:
             sku = product.default_code
             product_values = {}
-            if not product._is_esprinet_product():
+            if product not in esprinet_products:
                 _logger.warning("El producto %s no es un producto de Esprinet, se omite.", sku)
                 product.write(product_values)
                 continue
@@ -78,7 +86,7 @@ class ProductTemplate(models.Model):
                 _logger.warning("Este producto no tiene SKU: %s", product.id)
                 product.write(product_values)
                 continue
-            response_pricing = self.env['esprinet.api.products.service'].get_pricing(esprinet_product_code=sku)
+            response_pricing = pricing_by_sku.get(sku)
             if not response_pricing:
                 _logger.warning("No se pudo obtener el precio para el producto con SKU %s", sku)
                 product.write(product_values)
@@ -99,7 +107,7 @@ class ProductTemplate(models.Model):
                 product_values['standard_price'] = standard_price
                 product_values['list_price'] = standard_price * (1 + margin / 100.0)
 
-            response_availability = self.env['esprinet.api.products.service'].get_availability(esprinet_product_code=sku)
+            response_availability = availability_by_sku.get(sku)
             if not response_availability:
                 _logger.warning("No se pudo obtener la disponibilidad para el producto con SKU %s", sku)
                 product.write(product_values)
@@ -124,6 +132,24 @@ class ProductTemplate(models.Model):
 
         _logger.info("Sincronización de productos de Esprinet finalizada. Se procesaron %d productos.", processed_count)
 
+    @api.model
+    def _get_esprinet_sale_margin(self):
+        """
+        Margen de venta (%) configurado en los ajustes
+        (esprinet_connector.sale_margin). Si aún no se ha guardado, se usa
+        el parámetro antiguo esprinet_connector.margin, que era el que
+        leía este cron, y si tampoco existe ESPRINET_DEFAULT_SALE_MARGIN.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        margin = params.get_param('esprinet_connector.sale_margin')
+        if margin in (None, False, ''):
+            margin = params.get_param('esprinet_connector.margin', default=ESPRINET_DEFAULT_SALE_MARGIN)
+        try:
+            return float(margin)
+        except (TypeError, ValueError):
+            _logger.warning("Margen de venta no válido: %s", margin)
+            return ESPRINET_DEFAULT_SALE_MARGIN
+
     def _is_esprinet_product(self):
         """
         Verifica si este producto es suministrado por Esprinet.
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, _
+from odoo.tools import float_compare
+
+from .product_template import ESPRINET_DEFAULT_SALE_MARGIN
 
 class ResConfigSettings(models.TransientModel):
     _inherit = 'res.config.settings'
@@ -11,18 +14,65 @@ class ResConfigSettings(models.TransientModel):
     esprinet_username = fields.Char(string='Usuario', config_parameter='esprinet_connector.username')
     esprinet_password = fields.Char(string='Contraseña', config_parameter='esprinet_connector.password')
 
+    # Transporte HTTP
+    esprinet_http_pool_size = fields.Integer(string='Conexiones en el pool HTTP', config_parameter='esprinet_connector.http_pool_size',
+        help='Número máximo de conexiones keep-alive reutilizadas por cada worker de Odoo.', default=10)
+    esprinet_http_connect_timeout = fields.Float(string='Timeout de conexión (s)', config_parameter='esprinet_connector.http_connect_timeout',
+        help='Segundos máximos para establecer la conexión TCP/TLS con la API de Esprinet.', default=5.0)
+    esprinet_http_read_timeout = fields.Float(string='Timeout de lectura (s)', config_parameter='esprinet_connector.http_read_timeout',
+        help='Segundos máximos de espera de la respuesta de la API de Esprinet.', default=30.0)
+    esprinet_batch_max_workers = fields.Integer(string='Peticiones simultáneas', config_parameter='esprinet_connector.batch_max_workers',
+        help='Número máximo de peticiones en paralelo al consultar la API en lote (limitado por el tamaño del pool).', default=8)
+    esprinet_batch_max_per_endpoint = fields.Integer(string='Peticiones simultáneas por endpoint', config_parameter='esprinet_connector.batch_max_per_endpoint',
+        help='Número máximo de peticiones en paralelo a una misma familia de endpoints (products, orders, cloud...).', default=4)
+    esprinet_rate_limit = fields.Float(string='Peticiones por segundo', config_parameter='esprinet_connector.rate_limit',
+        help='Cuota de peticiones por segundo a la API de Esprinet, compartida por todos los workers.', default=10.0)
+    esprinet_rate_burst = fields.Integer(string='Ráfaga máxima', config_parameter='esprinet_connector.rate_burst',
+        help='Peticiones que pueden enviarse seguidas cuando no se ha consumido la cuota.', default=20)
+    esprinet_max_retries = fields.Integer(string='Reintentos', config_parameter='esprinet_connector.max_retries',
+        help='Reintentos ante respuestas 429/5xx, timeouts o errores de conexión (con espera exponencial y respetando Retry-After).', default=3)
+
+    # Circuit breaker
+    esprinet_breaker_failure_threshold = fields.Integer(string='Fallos para abrir el circuito', config_parameter='esprinet_connector.breaker_failure_threshold',
+        help='Fallos consecutivos (errores de conexión, timeouts, 5xx o llamadas lentas) tras los que se dejan de enviar peticiones a esa familia de endpoints.', default=5)
+    esprinet_breaker_slow_call = fields.Float(string='Llamada lenta (s)', config_parameter='esprinet_connector.breaker_slow_call',
+        help='Las respuestas que tardan más de estos segundos cuentan como fallo.', default=10.0)
+    esprinet_breaker_reset_timeout = fields.Float(string='Espera antes de reintentar (s)', config_parameter='esprinet_connector.breaker_reset_timeout',
+        help='Segundos que el circuito permanece abierto antes de dejar pasar una petición de prueba.', default=60.0)
+
+    # Caché de respuestas
+    esprinet_response_cache_max_bytes = fields.Integer(string='Memoria de la caché (bytes)', config_parameter='esprinet_connector.response_cache_max_bytes',
+        help='Tamaño máximo de las respuestas cacheadas en cada worker; al superarlo se descartan las menos usadas.', default=16 * 1024 * 1024)
+    esprinet_response_cache_shared = fields.Boolean(string='Compartir la caché entre workers', config_parameter='esprinet_connector.response_cache_shared',
+        help='Guarda también las respuestas cacheadas en base de datos para que las aprovechen todos los workers.')
+
     # FTP Configuration
     esprinet_ftp_host = fields.Char(string='Host FTP', config_parameter='esprinet_connector.ftp_host')
     esprinet_ftp_username = fields.Char(string='Usuario FTP', config_parameter='esprinet_connector.ftp_username')
     esprinet_ftp_password = fields.Char(string='Contraseña FTP', config_parameter='esprinet_connector.ftp_password')
     esprinet_ftp_path = fields.Char(string='Ruta del archivo de catálogo', config_parameter='esprinet_connector.ftp_path',
                                    help='Ruta al archivo Catalogue.json en el servidor FTP (por ejemplo, Catalogue.json)')
+    esprinet_catalogue_skip_existing = fields.Boolean(string='Sólo crear productos nuevos', config_parameter='esprinet_connector.catalogue_skip_existing',
+        help='Si se marca, la importación del catálogo no actualiza los productos existentes. Si no, se actualizan sólo aquellos cuya fila del catálogo ha cambiado desde la última importación.')
+    esprinet_catalogue_workers = fields.Integer(string='Workers de importación', config_parameter='esprinet_connector.catalogue_workers',
+        help='Particiones del catálogo que se importan en paralelo, cada una con su propia conexión a la base de datos. Con 1 se importa de forma secuencial.', default=1)
+    esprinet_catalogue_engine = fields.Selection([
+        ('orm', 'ORM (fila a fila)'),
+        ('staging', 'Staging SQL (COPY)'),
+    ], string='Motor de importación', config_parameter='esprinet_connector.catalogue_engine', default='orm',
+        help='Con Staging SQL el catálogo se carga en bloque en una tabla intermedia, las altas, cambios y bajas se calculan en SQL y sólo esas filas pasan por el ORM.')
+    esprinet_catalogue_pipelined = fields.Boolean(string='Importar durante la descarga', config_parameter='esprinet_connector.catalogue_pipelined',
+        help='Procesa los productos a medida que llega el fichero del FTP en lugar de esperar a que termine la descarga. Requiere que el servidor informe del tamaño y la fecha (SIZE/MDTM) del catálogo.')
+    esprinet_catalogue_cprofile = fields.Boolean(string='Perfilar la importación', config_parameter='esprinet_connector.catalogue_cprofile',
+        help='Perfila con cProfile cada fase de la importación del catálogo y guarda en la ejecución el detalle de la más lenta. Hace la importación algo más lenta.')
 
     # Margen de venta
     esprinet_sale_margin = fields.Float(string='Porcentaje margen venta (%)', config_parameter='esprinet_connector.sale_margin',
-        help='Porcentaje de margen a aplicar sobre el precio de coste para calcular el precio de venta.', default=10.0)
+        help='Porcentaje de margen a aplicar sobre el precio de coste para calcular el precio de venta. Al cambiarlo se recalcula en segundo plano el precio de venta de todos los productos de Esprinet.',
+        default=ESPRINET_DEFAULT_SALE_MARGIN)
 
     def set_values(self):
+        previous_margin = self.env['product.template']._get_esprinet_sale_margin()
         super(ResConfigSettings, self).set_values()
         self.env['ir.config_parameter'].set_param('esprinet_connector.username', self.esprinet_username or '')
         self.env['ir.config_parameter'].set_param('esprinet_connector.password', self.esprinet_password or '')
@@ -31,6 +81,8 @@ class ResConfigSettings(models.TransientModel):
         self.env['ir.config_parameter'].set_param('esprinet_connector.ftp_password', self.esprinet_ftp_password or '')
         self.env['ir.config_parameter'].set_param('esprinet_connector.ftp_path', self.esprinet_ftp_path or '')
         self.env['ir.config_parameter'].set_param('esprinet_connector.sale_margin', self.esprinet_sale_margin or 0.0)
+        if float_compare(previous_margin, self.esprinet_sale_margin or 0.0, precision_digits=4):
+            self.env['esprinet.reprice.job']._enqueue(self.esprinet_sale_margin or 0.0, previous_margin)
 
     @api.model
     def get_values(self):
@@ -42,21 +94,36 @@ class ResConfigSettings(models.TransientModel):
             esprinet_ftp_username=self.env['ir.config_parameter'].sudo().get_param('esprinet_connector.ftp_username'),
             esprinet_ftp_password=self.env['ir.config_parameter'].sudo().get_param('esprinet_connector.ftp_password'),
             esprinet_ftp_path=self.env['ir.config_parameter'].sudo().get_param('esprinet_connector.ftp_path'),
-            esprinet_sale_margin=float(self.env['ir.config_parameter'].sudo().get_param('esprinet_connector.sale_margin', default=0.0)),
+            esprinet_sale_margin=self.env['product.template']._get_esprinet_sale_margin(),
         )
         return res
 
+    def action_reprice_esprinet_products(self):
+        """Manual action to recalculate the sale price of Esprinet products"""
+        margin = self.env['product.template']._get_esprinet_sale_margin()
+        self.env['esprinet.reprice.job']._enqueue(margin, margin)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Success'),
+                'message': _('Sale price recalculation started in the background'),
+                'type': 'success',
+                'sticky': False,
+            }
+        }
+
     def action_download_catalogue(self):
         """Manual action to download and process catalogue"""
         try:
             catalogue_service = self.env['esprinet.catalogue.service']
-            catalogue_service.download_and_process_catalogue()
+            catalogue_service.download_and_process_catalogue(force=True)
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
-                    'title': 'Success',
-                    'message': 'Catalogue download and processing started successfully',
+                    'title': _('Success'),
+                    'message': _('Catalogue download and processing started successfully'),
                     'type': 'success',
                     'sticky': False,
                 }
@@ -66,8 +133,8 @@ class ResConfigSettings(models.TransientModel):
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
-                    'title': 'Error',
-                    'message': f'Failed to start catalogue processing: {str(e)}',
+                    'title': _('Error'),
+                    'message': _('Failed to start catalogue processing: %s') % str(e),
                     'type': 'danger',
                     'sticky': True,
                 }
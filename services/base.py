@@ -1,11 +1,64 @@
 # -*- coding: utf-8 -*-
 
+import os
 import requests
 import logging
-from odoo import models, _
+from concurrent.futures import ThreadPoolExecutor
+from odoo import api, models, SUPERUSER_ID, _
 from odoo.exceptions import UserError
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+
+from .transport import (
+    get_pooled_session,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+from .token_cache import token_cache
+from . import codec
+from .rate_limit import (
+    rate_limiter,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_BURST,
+    DEFAULT_RATE_LEASE,
+    DEFAULT_RATE_WAIT,
+)
+from .retry import (
+    send_with_retry,
+    RetryPolicy,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_BACKOFF_BASE,
+    DEFAULT_BACKOFF_MAX,
+)
+from .circuit_breaker import (
+    get_breaker,
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_SLOW_CALL_THRESHOLD,
+    DEFAULT_RESET_TIMEOUT,
+)
+from .response_cache import (
+    response_cache,
+    is_fresh,
+    CacheEntry,
+    DEFAULT_RESPONSE_CACHE_MAX_BYTES,
+)
+from .coalesce import single_flight
+from .json_stream import iter_array_items, DEFAULT_CHUNK_SIZE
+from .batch import (
+    run_batch,
+    BatchResult,
+    DEFAULT_BATCH_MAX_WORKERS,
+    DEFAULT_BATCH_MAX_PER_ENDPOINT,
+)
+
+# Vida asumida de un token cuyo expiresUtc no se puede interpretar
+TOKEN_FALLBACK_LIFETIME = 300
+# Códigos HTTP con los que la API indica que el token ya no es válido
+AUTH_ERROR_STATUS_CODES = (401, 403)
+# Máximo de páginas de un listado paginado: evita un bucle infinito si la
+# API ignora el parámetro de página y devuelve siempre la misma
+MAX_LIST_PAGES = 10000
 
 _logger = logging.getLogger(__name__)
 
@@ -35,6 +88,48 @@ class EsprinetApiBaseService(models.AbstractModel):
 
         return username, password
 
+    def _get_transport_config(self):
+        """
+        Obtiene la configuración del transporte HTTP (tamaño del pool,
+        timeouts de conexión y lectura por separado, concurrencia de las
+        peticiones en lote, límite de peticiones por segundo, reintentos,
+        circuit breaker y caché de respuestas).
+        """
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+
+        def _param(key, default, cast):
+            try:
+                value = cast(get_param(key, default=default))
+            except (TypeError, ValueError):
+                _logger.warning("Invalid value for %s, using %s", key, default)
+                return default
+            return value if value > 0 else default
+
+        return {
+            'pool_size': _param('esprinet_connector.http_pool_size', DEFAULT_POOL_SIZE, int),
+            'connect_timeout': _param('esprinet_connector.http_connect_timeout', DEFAULT_CONNECT_TIMEOUT, float),
+            'read_timeout': _param('esprinet_connector.http_read_timeout', DEFAULT_READ_TIMEOUT, float),
+            'batch_max_workers': _param('esprinet_connector.batch_max_workers', DEFAULT_BATCH_MAX_WORKERS, int),
+            'batch_max_per_endpoint': _param('esprinet_connector.batch_max_per_endpoint', DEFAULT_BATCH_MAX_PER_ENDPOINT, int),
+            'rate_limit': _param('esprinet_connector.rate_limit', DEFAULT_RATE_LIMIT, float),
+            'rate_burst': _param('esprinet_connector.rate_burst', DEFAULT_RATE_BURST, int),
+            'max_retries': _param('esprinet_connector.max_retries', DEFAULT_MAX_RETRIES, int),
+            'backoff_base': _param('esprinet_connector.retry_backoff_base', DEFAULT_BACKOFF_BASE, float),
+            'backoff_max': _param('esprinet_connector.retry_backoff_max', DEFAULT_BACKOFF_MAX, float),
+            'breaker_failure_threshold': _param('esprinet_connector.breaker_failure_threshold', DEFAULT_FAILURE_THRESHOLD, int),
+            'breaker_slow_call': _param('esprinet_connector.breaker_slow_call', DEFAULT_SLOW_CALL_THRESHOLD, float),
+            'breaker_reset_timeout': _param('esprinet_connector.breaker_reset_timeout', DEFAULT_RESET_TIMEOUT, float),
+            'response_cache_max_bytes': _param('esprinet_connector.response_cache_max_bytes', DEFAULT_RESPONSE_CACHE_MAX_BYTES, int),
+            'response_cache_shared': bool(get_param('esprinet_connector.response_cache_shared')),
+        }
+
+    def _get_timeout(self, transport_config=None):
+        """
+        Devuelve la tupla (connect, read) que espera requests.
+        """
+        config = transport_config or self._get_transport_config()
+        return (config['connect_timeout'], config['read_timeout'])
+
     def _perform_login(self):
         """
         Realiza el inicio de sesión para obtener el token de autenticación.
@@ -52,8 +147,16 @@ class EsprinetApiBaseService(models.AbstractModel):
             'Accept': 'application/json',
         }
 
+        transport_config = self._get_transport_config()
+        session = get_pooled_session(transport_config['pool_size'])
+
         try:
-            response = requests.post(login_url, json=login_data, headers=headers, timeout=30)
+            response = session.post(
+                login_url,
+                json=login_data,
+                headers=headers,
+                timeout=self._get_timeout(transport_config)
+            )
             response.raise_for_status()
 
             response_data = response.json()
@@ -87,63 +190,287 @@ class EsprinetApiBaseService(models.AbstractModel):
 
         except requests.exceptions.HTTPError as e:
             _logger.error("Login HTTP Error: %s - %s", e.response.status_code, e.response.text)
-            self.env['ir.config_parameter'].sudo().set_param(
-                'esprinet_connector.auth_token',
-                None
-            )
             raise UserError(_('Login failed: %s') % e.response.text)
         except requests.exceptions.RequestException as e:
             _logger.error("Login Request Exception: %s", e)
             raise UserError(_('Login failed: Connection error'))
 
+    def _parse_token_expiry(self, expires_utc, fallback=True):
+        """
+        Convierte expiresUtc (ISO 8601 en UTC) a timestamp. Si el formato no
+        es válido se asume una vida corta para forzar una renovación pronto
+        (o None si fallback es False).
+        """
+        if expires_utc:
+            try:
+                # Ajustar para manejar precisión adicional en el formato ISO 8601
+                expiry = datetime.strptime(
+                    str(expires_utc).rstrip('Z').split('.')[0],
+                    "%Y-%m-%dT%H:%M:%S"
+                )
+                return expiry.replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                _logger.error("Invalid token expiry format: %s", expires_utc)
+        return time.time() + TOKEN_FALLBACK_LIFETIME if fallback else None
+
+    def _get_token_cache_key(self):
+        username, password = self._get_credentials()
+        return token_cache.make_key(self._get_base_url(), username, password)
+
     def _get_auth_token(self):
         """
         Obtiene el token de autenticación con un mecanismo de caché.
+
+        El token se guarda en memoria del proceso y se renueva antes de
+        expiresUtc. Sólo un hilo por proceso realiza la renovación y, entre
+        workers, un advisory lock de PostgreSQL garantiza un único login.
         """
-        # Check if we have a cached token that's still valid
-        cache_key = 'esprinet_connector.auth_token'
-        cache_expiry_key = 'esprinet_connector.auth_token_expiry'
+        key = self._get_token_cache_key()
+        auth_token = token_cache.get(key)
+        if auth_token:
+            return auth_token
 
-        cached_token = self.env['ir.config_parameter'].sudo().get_param(cache_key)
-        token_expiry = self.env['ir.config_parameter'].sudo().get_param(cache_expiry_key)
+        with token_cache.lock(key):
+            auth_token = token_cache.get(key)
+            if auth_token:
+                return auth_token
 
-        if cached_token and token_expiry:
-            try:
-                # Ajustar para manejar precisión adicional en el formato ISO 8601
-                token_expiry_time = datetime.strptime(token_expiry.split('.')[0], "%Y-%m-%dT%H:%M:%S").timestamp()
-                if time.time() < token_expiry_time:
-                    return cached_token
-            except ValueError:
-                _logger.error("Invalid token expiry format: %s", token_expiry)
+            auth_token, expires_at = self._refresh_auth_token(key)
+            token_cache.set(key, auth_token, expires_at)
+            return auth_token
+
+    def _refresh_auth_token(self, key):
+        """
+        Renueva el token en una transacción independiente protegida por un
+        advisory lock. Si otro worker ya lo ha renovado se reutiliza el suyo.
+        :return: (token, timestamp de expiración)
+        """
+        with self.env.registry.cursor() as cr:
+            cr.execute(
+                "SELECT pg_advisory_xact_lock(%s)",
+                (token_cache.advisory_lock_id(key),)
+            )
+            env = api.Environment(cr, SUPERUSER_ID, self.env.context)
+            token_store = env['esprinet.auth.token']
 
-        auth_token, expires_utc = self._perform_login()
+            stored_token, expires_at = token_store._get_stored_token(key)
+            if stored_token and token_cache.is_fresh(expires_at):
+                return stored_token, expires_at
 
-        self.env['ir.config_parameter'].sudo().set_param(
-            cache_key,
-            auth_token
+            auth_token, expires_utc = self.with_env(env)._perform_login()
+            expires_at = self._parse_token_expiry(expires_utc)
+            token_store._store_token(
+                key,
+                auth_token,
+                expires_at,
+                base_url=self._get_base_url(),
+                username=self._get_credentials()[0],
+            )
+            # El commit al salir del cursor libera el advisory lock
+            return auth_token, expires_at
+
+    def _invalidate_auth_token(self, status_code=None):
+        """
+        Descarta el token en caché del proceso y el persistido. Sólo debe
+        llamarse cuando la API rechaza el token (401/403).
+        """
+        key = self._get_token_cache_key()
+        token_cache.invalidate(key)
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, self.env.context)
+            env['esprinet.auth.token']._invalidate_token(key, status_code)
+        _logger.warning(
+            "Esprinet auth token invalidated after HTTP %s",
+            status_code
         )
-        self.env['ir.config_parameter'].sudo().set_param(
-            cache_expiry_key,
-            expires_utc
+
+    def _get_session(self):
+        """
+        Devuelve la sesión HTTP compartida (pool de conexiones keep-alive)
+        del proceso. La cabecera de autenticación se envía en cada petición.
+        """
+        return get_pooled_session(self._get_transport_config()['pool_size'])
+
+    def _get_endpoint_group(self, endpoint):
+        """
+        Familia del endpoint (products, orders, cloud, customerDepot,
+        cashandcarries...): el primer segmento de la ruta.
+        """
+        return endpoint.strip('/').split('/', 1)[0]
+
+    def _build_request(self, method, endpoint, params=None, json=None, headers=None, transport_config=None):
+        """
+        Prepara los argumentos de session.request para una llamada. Es la
+        parte que usa el entorno (configuración y token), de modo que la
+        petición resultante puede enviarse desde cualquier hilo.
+        """
+        config = transport_config or self._get_transport_config()
+
+        default_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Authorization': f'Bearer {self._get_auth_token()}',
+        }
+        if headers:
+            default_headers.update(headers)
+
+        return {
+            'method': method,
+            'url': f"{self._get_base_url()}/{endpoint}",
+            'params': params,
+            # Se codifica aquí con el codec del módulo en lugar de json=
+            'data': codec.dumps(json) if json is not None else None,
+            'headers': default_headers,
+            'timeout': self._get_timeout(config),
+        }
+
+    def _get_rate_limit_acquire(self, transport_config):
+        """
+        Devuelve una función sin argumentos que consume un token del bucket
+        compartido por todos los workers. Sólo usa el registro (no el
+        entorno), así que puede llamarse desde cualquier hilo.
+        """
+        registry = self.env.registry
+        key = self._get_token_cache_key()
+        rate = transport_config['rate_limit']
+        burst = transport_config['rate_burst']
+
+        def _refill(count):
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                return env['esprinet.rate.bucket']._take_tokens(key, count, rate, burst)
+
+        lease = min(DEFAULT_RATE_LEASE, burst)
+        return lambda: rate_limiter.acquire(key, _refill, lease=lease, timeout=DEFAULT_RATE_WAIT)
+
+    def _get_breaker_factory(self, transport_config):
+        """
+        Devuelve una función grupo -> CircuitBreaker del proceso. Los cambios
+        de estado se guardan en esprinet.circuit.breaker con su propio cursor,
+        de modo que también pueden notificarse desde otros hilos.
+        """
+        registry = self.env.registry
+        key = self._get_token_cache_key()
+
+        def _on_state_change(breaker, old_state, new_state):
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['esprinet.circuit.breaker']._record_state(
+                    breaker.name,
+                    new_state,
+                    breaker.failures,
+                    breaker.last_error,
+                    os.getpid(),
+                )
+
+        def _get(group):
+            return get_breaker(
+                key,
+                group,
+                on_state_change=_on_state_change,
+                failure_threshold=transport_config['breaker_failure_threshold'],
+                slow_call_threshold=transport_config['breaker_slow_call'],
+                reset_timeout=transport_config['breaker_reset_timeout'],
+            )
+        return _get
+
+    def _get_sender(self, session, transport_config):
+        """
+        Devuelve la función send(request, group) que envía una petición
+        preparada aplicando el circuit breaker del grupo de endpoints, el
+        limitador de peticiones y los reintentos, y agrupando los GET
+        idénticos simultáneos. Es segura entre hilos.
+        """
+        policy = RetryPolicy(
+            transport_config['max_retries'],
+            transport_config['backoff_base'],
+            transport_config['backoff_max'],
         )
+        acquire = self._get_rate_limit_acquire(transport_config)
+        get_group_breaker = self._get_breaker_factory(transport_config)
 
-        return auth_token
+        def _send(request, group):
+            def _call():
+                return send_with_retry(
+                    session,
+                    request,
+                    policy,
+                    acquire=acquire,
+                    breaker=get_group_breaker(group),
+                )
+            if request['method'].upper() != 'GET' or request.get('stream'):
+                # El cuerpo de una respuesta en streaming sólo puede leerse una vez
+                return _call()
+            # Los GET idénticos en vuelo en el proceso comparten una única
+            # llamada; cada llamador decodifica su propia copia del cuerpo
+            return single_flight.do(single_flight.make_key(request), _call)
+        return _send
 
-    def _get_session(self):
+    def _parse_response(self, response):
+        """
+        Decodifica una respuesta correcta con el codec JSON más rápido
+        instalado. No usa el entorno, por lo que también se llama desde los
+        hilos de las peticiones en lote.
         """
-        Crea una sesión con el token de autenticación.
+        if response.status_code == 204:  # No Content
+            return True
+        return codec.loads(response.content)
+
+    def _handle_http_error(self, url, error):
+        """
+        Registra un error HTTP y, si la API ha rechazado el token, lo invalida.
         """
-        session = requests.Session()
-        auth_token = self._get_auth_token()
+        _logger.error("HTTP Error for %s: %s", url, error.response.text)
+        if error.response.status_code in AUTH_ERROR_STATUS_CODES:
+            self._invalidate_auth_token(error.response.status_code)
+
+    def _get_response_cache_key(self, endpoint, params=None, headers=None):
+        return response_cache.make_key(
+            self._get_token_cache_key(),
+            endpoint,
+            params or {},
+            headers or {},
+        )
 
-        # Set the Authorization header with the token
-        session.headers.update({
-            'Authorization': f'Bearer {auth_token}'
-        })
+    def _get_cached_response(self, key, transport_config):
+        """
+        Busca la respuesta en la caché del proceso y, si está activado el
+        backend compartido y no es válida, en la de base de datos.
+        """
+        entry = response_cache.get(key)
+        if is_fresh(entry) or not transport_config['response_cache_shared']:
+            return entry
+        row = self.env['esprinet.response.cache'].sudo()._get_entry(key)
+        if row is None:
+            return entry
+        shared_entry = CacheEntry(*row)
+        if entry is None or shared_entry.expires_at > entry.expires_at:
+            response_cache.set(key, shared_entry)
+            return shared_entry
+        return entry
 
-        return session
+    def _store_cached_response(self, key, endpoint, entry, transport_config):
+        response_cache.max_bytes = transport_config['response_cache_max_bytes']
+        response_cache.set(key, entry)
+        if not transport_config['response_cache_shared']:
+            return
+        # Cursor propio: un fallo al compartir la caché no debe afectar a la
+        # transacción del llamador
+        try:
+            with self.env.registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['esprinet.response.cache']._put_entry(
+                    key,
+                    endpoint,
+                    entry.body,
+                    entry.expires_at,
+                    entry.etag,
+                    entry.last_modified,
+                )
+        except Exception as e:
+            _logger.warning("Could not store shared response cache for %s: %s", endpoint, e)
 
-    def _make_request(self, method, endpoint, params=None, json=None, headers=None):
+    def _make_request(self, method, endpoint, params=None, json=None, headers=None, cache_ttl=None):
         """
         Realiza una solicitud HTTP a la API de Esprinet.
 
@@ -152,39 +479,228 @@ class EsprinetApiBaseService(models.AbstractModel):
         :param params: Parámetros de consulta.
         :param json: Datos en formato JSON.
         :param headers: Encabezados adicionales.
+        :param cache_ttl: Segundos que se guarda la respuesta en caché (sólo
+            GET). Caducada, se revalida con ETag/Last-Modified si la API los
+            envió. Por defecto no se cachea.
         :return: Respuesta de la API en formato JSON o None en caso de error.
         """
-        base_url = self._get_base_url()
-        url = f"{base_url}/{endpoint}"
-        session = self._get_session()
+        transport_config = self._get_transport_config()
 
-        default_headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-        }
-        if headers:
-            default_headers.update(headers)
+        cache_key = entry = None
+        if cache_ttl and method.upper() == 'GET':
+            cache_key = self._get_response_cache_key(endpoint, params, headers)
+            entry = self._get_cached_response(cache_key, transport_config)
+            if is_fresh(entry):
+                return codec.loads(entry.body)
+
+        session = get_pooled_session(transport_config['pool_size'])
+        request = self._build_request(method, endpoint, params, json, headers, transport_config)
+        send = self._get_sender(session, transport_config)
+
+        if entry is not None:
+            if entry.etag:
+                request['headers']['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                request['headers']['If-Modified-Since'] = entry.last_modified
 
         try:
-            response = session.request(
-                method,
-                url,
-                params=params,
-                json=json,
-                headers=default_headers,
-                timeout=30
-            )
+            response = send(request, self._get_endpoint_group(endpoint))
+            if entry is not None and response.status_code == 304:  # Not Modified
+                entry = entry._replace(expires_at=time.time() + cache_ttl)
+                self._store_cached_response(cache_key, endpoint, entry, transport_config)
+                return codec.loads(entry.body)
             response.raise_for_status()
-            if response.status_code == 204:  # No Content
-                return True
-            return response.json()
+            if cache_key and response.status_code == 200:
+                self._store_cached_response(cache_key, endpoint, CacheEntry(
+                    response.content,
+                    time.time() + cache_ttl,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified'),
+                ), transport_config)
+            return self._parse_response(response)
         except requests.exceptions.HTTPError as e:
-            _logger.error("HTTP Error for %s: %s", url, e.response.text)
-            self.env['ir.config_parameter'].sudo().set_param(
-                'esprinet_connector.auth_token',
-                None
-            )
+            self._handle_http_error(request['url'], e)
             return None
         except requests.exceptions.RequestException as e:
-            _logger.error("Request Exception for %s: %s", url, e)
+            _logger.error("Request Exception for %s: %s", request['url'], e)
             return None
+
+    def _extract_items(self, data, items_key=None):
+        """
+        Registros de una respuesta de listado: la propia lista o el miembro
+        items_key (o el primero que sea una lista) del objeto devuelto.
+        """
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            if items_key:
+                return data.get(items_key) or []
+            return next((value for value in data.values() if isinstance(value, list)), [])
+        return []
+
+    def _iter_records(self, endpoint, params=None, headers=None, items_key=None, page_size=None,
+                      page_param='pageNumber', page_size_param='pageSize', first_page=1):
+        """
+        Generador que devuelve uno a uno los registros de un listado.
+
+        Con page_size se recorren las páginas de la API, pidiendo la
+        siguiente en segundo plano mientras se consume la actual, hasta que
+        una página llega incompleta. Sin page_size se hace una sola petición
+        y el array se decodifica por trozos a medida que llega, sin cargar
+        la respuesta entera en memoria.
+
+        Si la petición falla después de haber devuelto registros se lanza
+        UserError: el listado quedaría incompleto sin que se notara.
+
+        :param items_key: Miembro de la respuesta que contiene los registros
+            (por defecto, la respuesta si es una lista o su primer array).
+        """
+        if page_size:
+            return self._iter_pages(
+                endpoint, params, headers, items_key, page_size,
+                page_param, page_size_param, first_page
+            )
+        return self._iter_stream(endpoint, params, headers, items_key)
+
+    def _iter_stream(self, endpoint, params=None, headers=None, items_key=None):
+        transport_config = self._get_transport_config()
+        session = get_pooled_session(transport_config['pool_size'])
+        request = self._build_request('GET', endpoint, params, None, headers, transport_config)
+        request['stream'] = True
+        send = self._get_sender(session, transport_config)
+
+        try:
+            response = send(request, self._get_endpoint_group(endpoint))
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            self._handle_http_error(request['url'], e)
+            return
+        except requests.exceptions.RequestException as e:
+            _logger.error("Request Exception for %s: %s", request['url'], e)
+            return
+
+        try:
+            yield from iter_array_items(
+                response.iter_content(chunk_size=DEFAULT_CHUNK_SIZE),
+                key=items_key
+            )
+        except (ValueError, requests.exceptions.RequestException) as e:
+            # Ya se han devuelto registros: no se puede fingir que el
+            # listado ha terminado bien
+            _logger.error("Interrupted response stream for %s: %s", request['url'], e)
+            raise UserError(_('Esprinet response for %s could not be read completely: %s') % (endpoint, e))
+        finally:
+            response.close()
+
+    def _iter_pages(self, endpoint, params, headers, items_key, page_size,
+                    page_param, page_size_param, first_page):
+        transport_config = self._get_transport_config()
+        session = get_pooled_session(transport_config['pool_size'])
+        send = self._get_sender(session, transport_config)
+        group = self._get_endpoint_group(endpoint)
+
+        def _page_request(page):
+            # Se prepara en el hilo actual: usa el entorno (token, configuración)
+            page_params = dict(params or {})
+            page_params.update({page_param: page, page_size_param: page_size})
+            return self._build_request('GET', endpoint, page_params, None, headers, transport_config)
+
+        def _fetch(request):
+            response = send(request, group)
+            response.raise_for_status()
+            return self._parse_response(response)
+
+        page = first_page
+        previous_items = None
+        request = _page_request(page)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='esprinet-page') as executor:
+            future = executor.submit(_fetch, request)
+            while future is not None:
+                try:
+                    data = future.result()
+                except requests.exceptions.HTTPError as e:
+                    self._handle_http_error(request['url'], e)
+                    error = e
+                except requests.exceptions.RequestException as e:
+                    _logger.error("Request Exception for %s: %s", request['url'], e)
+                    error = e
+                else:
+                    error = None
+                if error is not None:
+                    if previous_items is None:
+                        return
+                    # Ya se han devuelto las páginas anteriores: no se puede
+                    # fingir que el listado ha terminado bien
+                    raise UserError(_('Esprinet listing %s failed at page %s: %s') % (endpoint, page, error))
+
+                items = self._extract_items(data, items_key)
+                if items and items == previous_items:
+                    _logger.warning(
+                        "Page %s of %s repeats the previous page, stopping pagination", page, endpoint
+                    )
+                    return
+                future = None
+                if len(items) >= page_size:
+                    if page - first_page + 1 >= MAX_LIST_PAGES:
+                        raise UserError(_('Esprinet listing %s has more than %s pages') % (endpoint, MAX_LIST_PAGES))
+                    page += 1
+                    request = _page_request(page)
+                    future = executor.submit(_fetch, request)
+                previous_items = items
+                yield from items
+
+    def _make_batch_request(self, specs):
+        """
+        Realiza varias solicitudes en paralelo con un pool de hilos acotado.
+
+        La preparación (token, configuración) y el tratamiento de errores se
+        hacen en el hilo actual; los hilos sólo envían y decodifican. El
+        número de peticiones simultáneas está limitado en total y por
+        familia de endpoint.
+
+        :param specs: Lista de dicts con las claves method y endpoint y,
+            opcionalmente, params, json y headers (como _make_request).
+        :return: Lista de BatchResult(spec, data, error) en el orden de specs.
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+
+        transport_config = self._get_transport_config()
+        session = get_pooled_session(transport_config['pool_size'])
+        prepared = [
+            self._build_request(transport_config=transport_config, **spec)
+            for spec in specs
+        ]
+        groups = [self._get_endpoint_group(spec['endpoint']) for spec in specs]
+        send = self._get_sender(session, transport_config)
+
+        def _send(request_group):
+            request, group = request_group
+            response = send(request, group)
+            response.raise_for_status()
+            return self._parse_response(response)
+
+        outcomes = run_batch(
+            _send,
+            list(zip(prepared, groups)),
+            groups,
+            # Más hilos que conexiones en el pool sólo descartaría conexiones
+            max_workers=min(transport_config['batch_max_workers'], transport_config['pool_size']),
+            max_per_endpoint=transport_config['batch_max_per_endpoint'],
+        )
+
+        results = []
+        auth_rejected = None
+        for spec, request, (data, error) in zip(specs, prepared, outcomes):
+            if isinstance(error, requests.exceptions.HTTPError):
+                _logger.error("HTTP Error for %s: %s", request['url'], error.response.text)
+                if error.response.status_code in AUTH_ERROR_STATUS_CODES:
+                    auth_rejected = error.response.status_code
+            elif error is not None:
+                _logger.error("Request Exception for %s: %s", request['url'], error)
+            results.append(BatchResult(spec, data, error))
+
+        if auth_rejected:
+            self._invalidate_auth_token(auth_rejected)
+        return results
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_MAX_WORKERS = 8
+DEFAULT_BATCH_MAX_PER_ENDPOINT = 4
+
+# Resultado de cada petición de un lote: la especificación original, los
+# datos decodificados (o None) y la excepción que la hizo fallar (o None).
+BatchResult = namedtuple('BatchResult', ['spec', 'data', 'error'])
+
+
+class EndpointLimiter(object):
+    """
+    Limita las peticiones simultáneas por grupo de endpoint con un
+    semáforo por grupo, creado bajo demanda.
+    """
+
+    def __init__(self, max_per_endpoint=DEFAULT_BATCH_MAX_PER_ENDPOINT):
+        self.max_per_endpoint = max_per_endpoint
+        self._semaphores = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, group):
+        with self._guard:
+            semaphore = self._semaphores.get(group)
+            if semaphore is None:
+                semaphore = self._semaphores[group] = threading.BoundedSemaphore(
+                    self.max_per_endpoint
+                )
+            return semaphore
+
+
+def run_batch(send, requests, groups, max_workers=DEFAULT_BATCH_MAX_WORKERS,
+              max_per_endpoint=DEFAULT_BATCH_MAX_PER_ENDPOINT):
+    """
+    Ejecuta send(request) para cada petición en un pool de hilos acotado.
+
+    send no debe usar el entorno de Odoo (no es seguro entre hilos): recibe
+    la petición ya preparada y sólo hace la llamada HTTP y la decodificación.
+
+    :param send: función que ejecuta una petición y devuelve sus datos.
+    :param requests: lista de peticiones preparadas.
+    :param groups: grupo de endpoint de cada petición, para el límite.
+    :return: lista de tuplas (datos, excepción) en el orden de entrada.
+    """
+    if not requests:
+        return []
+
+    limiter = EndpointLimiter(max_per_endpoint)
+
+    def _task(request, group):
+        with limiter(group):
+            try:
+                return send(request), None
+            except Exception as e:
+                return None, e
+
+    workers = max(1, min(max_workers, len(requests)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='esprinet-batch') as executor:
+        futures = [
+            executor.submit(_task, request, group)
+            for request, group in zip(requests, groups)
+        ]
+        return [future.result() for future in futures]
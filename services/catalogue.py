@@ -1,15 +1,92 @@
 # -*- coding: utf-8 -*-
 
 import ftplib
-import json
+import gc
+import hashlib
+import itertools
+import queue
 import tempfile
+import threading
+import time
 import os
+import shutil
 import logging
-from odoo import models, _
+from collections import Counter
+from contextlib import ExitStack, closing
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from odoo import api, models, tools, SUPERUSER_ID, _
+from odoo.tools import float_compare
 from odoo.exceptions import UserError
 
+from .json_stream import iter_array_items, iter_file_chunks
+from .catalogue_index import ProductIndex, row_fingerprint
+from .catalogue_partition import PartitionSpool, iter_spool, product_code, row_key
+from .catalogue_staging import STAGING_COLUMNS, CopyReader, iter_copy_chunks, staging_record
+from . import codec
+from .catalogue_resolver import ReferenceResolver
+from .catalogue_transform import TRANSFORM_BACKEND, InvalidRow, iter_row_chunks, transform_rows
+from .memory import format_mib, memory_usage, peak_rss
+from .catalogue_profile import CatalogueProfile
+
 _logger = logging.getLogger(__name__)
 
+# Rows between commits; new products are created in batches of this size
+CATALOGUE_BATCH_SIZE = 500
+
+# FTP transfer: socket timeout (s), block size and attempts for a dropped
+# connection, each one resuming where the previous one stopped
+FTP_TIMEOUT = 60
+FTP_BLOCK_SIZE = 256 * 1024
+FTP_DOWNLOAD_ATTEMPTS = 4
+FTP_RETRY_DELAY = 5
+
+# Chunks (of FTP_BLOCK_SIZE) buffered between the download thread and the
+# import in pipelined mode
+PIPELINE_BUFFER_CHUNKS = 64
+
+# Session-level advisory lock held for the whole catalogue import
+CATALOGUE_LOCK_ID = int.from_bytes(
+    hashlib.blake2b(b'esprinet_connector.catalogue_import', digest_size=8).digest(),
+    'big',
+    signed=True
+)
+
+# Above this share of catalogue products missing from the feed, the staging
+# engine assumes an incomplete file and does not retire them
+CATALOGUE_VANISHED_MAX_RATIO = 0.5
+
+# Share of limit_memory_soft at which the import stops at a commit point and
+# leaves the rest of the file to a fresh run, resumed from its checkpoint
+CATALOGUE_MEMORY_RATIO = 0.9
+
+# Fields refreshed on existing products when their catalogue row changes
+# (identity fields such as default_code, barcode or type are left alone)
+CATALOGUE_DELTA_FIELDS = (
+    'name',
+    'standard_price',
+    'list_price',
+    'volume',
+    'weight',
+    'purchase_ok',
+    'sale_ok',
+    'supplier_stock_qty',
+    'categ_id',
+    'description',
+    'description_sale',
+    'description_purchase',
+    'supplier_taxes_id',
+    'taxes_id',
+)
+
+class DownloadCancelled(Exception):
+    """The consumer of a pipelined download stopped reading"""
+
+
+class CatalogueMemoryLimit(Exception):
+    """The import worker got close to limit_memory_soft"""
+
+
 class EsprinetCatalogueService(models.AbstractModel):
     _name = 'esprinet.catalogue.service'
     _description = 'Esprinet Catalogue FTP Service'
@@ -34,57 +111,312 @@ class EsprinetCatalogueService(models.AbstractModel):
 
         return config
 
-    def _download_catalogue_file(self):
-        """Download Catalogue.json from FTP server"""
-        config = self._get_ftp_config()
+    def _connect_ftp(self, config):
+        """
+        Open the FTP connection. The host may include a port (host:port),
+        otherwise the standard FTP port is used
+        """
+        host, _sep, port = config['host'].rpartition(':')
+        if not host or not port.isdigit():
+            host, port = config['host'], 0
+        ftp = ftplib.FTP(timeout=FTP_TIMEOUT)
+        ftp.connect(host, int(port))
+        return ftp
+
+    def _get_remote_file_info(self, ftp, file_path):
+        """
+        Size and modification time (MDTM) of the catalogue on the FTP
+        server; either may be None if the server does not support it
+        """
+        info = {'path': file_path, 'size': None, 'modified': None}
+        try:
+            info['size'] = ftp.size(file_path)
+        except ftplib.all_errors:
+            _logger.warning("Could not determine file size")
+        try:
+            # "213 YYYYMMDDHHMMSS[.sss]" in UTC
+            response = ftp.voidcmd('MDTM %s' % file_path)
+            info['modified'] = datetime.strptime(response.split()[1][:14], '%Y%m%d%H%M%S')
+        except (ftplib.all_errors, IndexError, ValueError):
+            _logger.warning("Could not determine file modification time")
+        return info
+
+    def _get_remote_source_key(self, remote):
+        """
+        Identity of the remote catalogue (see _get_catalogue_source), or
+        None if the server did not report both its size and MDTM
+        """
+        if remote.get('size') is None or not remote.get('modified'):
+            return None
+        return 'ftp:%s|%s|%s' % (remote['path'], remote['size'], remote['modified'].isoformat())
 
-        temp_file = tempfile.NamedTemporaryFile(
-            mode = 'wb',
-            delete = False,
-            suffix = '.json'
-        )
-        temp_file_path = temp_file.name
+    def _get_catalogue_cache_path(self, remote_path):
+        """
+        Local copy of the catalogue, kept in the Odoo data directory so an
+        interrupted download or import can continue from it
+        """
+        cache_dir = os.path.join(tools.config['data_dir'], 'esprinet_catalogue', self.env.cr.dbname)
+        os.makedirs(cache_dir, exist_ok=True)
+        return os.path.join(cache_dir, os.path.basename(remote_path) or 'Catalogue.json')
 
+    def _read_cache_source(self, local_path):
         try:
-            _logger.info("Connecting to FTP server: %s", config['host'])
+            with open(local_path + '.source', 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _reset_catalogue_cache(self, local_path, source_key):
+        """Drop the cached copies of another file version and tag the new one"""
+        for path in (local_path, local_path + '.part', local_path + '.source'):
+            if os.path.exists(path):
+                os.unlink(path)
+        if source_key:
+            with open(local_path + '.source', 'w', encoding='utf-8') as f:
+                f.write(source_key)
+
+    def _clear_catalogue_cache(self, local_path):
+        for path in (local_path, local_path + '.part', local_path + '.source'):
+            try:
+                if os.path.exists(path):
+                    os.unlink(path)
+            except OSError as e:
+                _logger.warning("Could not remove cached catalogue %s: %s", path, str(e))
 
-            with ftplib.FTP(config['host']) as ftp:
-                ftp.login(config['username'], config['password'])
+    def _retrieve_catalogue(self, ftp, remote, partial_path, on_chunk=None, profile=None):
+        """
+        Download the catalogue into partial_path, appending from its
+        current size with a REST offset if it already holds part of it
+        :param on_chunk: called with every chunk received and its position
+            in the file
+        :param profile: CatalogueProfile that gets the bytes and time
+        :raises EOFError: if the transfer ends before the remote size
+        """
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        if remote['size'] is not None and offset > remote['size']:
+            offset = 0
+        if offset:
+            _logger.info("Resuming download of %s at byte %s", remote['path'], offset)
+        else:
+            _logger.info("Starting download of %s", remote['path'])
+
+        started = time.monotonic()
+        rest_refused = None
+        try:
+            with open(partial_path, 'ab' if offset else 'wb') as partial_file:
+                position = offset
 
-                try:
-                    file_size = ftp.size(config['file_path'])
-                    _logger.info("Catalogue file size: %s bytes", file_size)
-                except:
-                    file_size = None
-                    _logger.warning("Could not determine file size")
+                def write_chunk(chunk):
+                    nonlocal position
+                    partial_file.write(chunk)
+                    if on_chunk is not None:
+                        on_chunk(chunk, position)
+                    position += len(chunk)
+
+                ftp.retrbinary(
+                    'RETR %s' % remote['path'],
+                    write_chunk,
+                    blocksize=FTP_BLOCK_SIZE,
+                    rest=offset or None
+                )
+        except ftplib.error_perm as e:
+            if not offset or not str(e).startswith(('500', '502', '504')):
+                raise
+            rest_refused = e
+        finally:
+            elapsed = max(time.monotonic() - started, 1e-6)
+            downloaded = os.path.getsize(partial_path) - offset
+            if profile is not None:
+                profile.add_download(downloaded, elapsed)
+            _logger.info(
+                "Downloaded %s bytes in %.1f s (%.2f MB/s)",
+                downloaded,
+                elapsed,
+                downloaded / elapsed / (1024.0 * 1024.0)
+            )
 
-                _logger.info("Starting download of %s", config['file_path'])
+        if rest_refused:
+            _logger.warning("FTP server does not support REST (%s), restarting download", str(rest_refused))
+            os.unlink(partial_path)
+            return self._retrieve_catalogue(ftp, remote, partial_path, on_chunk, profile)
 
-                def write_chunk(chunk):
-                    temp_file.write(chunk)
+        size = os.path.getsize(partial_path)
+        if remote['size'] is not None and size != remote['size']:
+            raise EOFError('Incomplete download: %s of %s bytes' % (size, remote['size']))
 
-                ftp.retrbinary(f"RETR {config['file_path']}", write_chunk)
-                temp_file.close()
+    def _prepare_catalogue_download(self, force=False):
+        """
+        Compare the remote catalogue with the last completed import and
+        with the local cache
+        :param force: download even if the file was already imported
+        :return: (FTP config, remote file info, local path, state) where
+            state is 'unchanged', 'cached' (complete copy of the same file
+            version in the cache) or 'download'
+        """
+        config = self._get_ftp_config()
+        local_path = self._get_catalogue_cache_path(config['file_path'])
 
-                _logger.info(
-                    "Download completed successfully to %s",
-                    temp_file_path
+        try:
+            _logger.info("Connecting to FTP server: %s", config['host'])
+            with self._connect_ftp(config) as ftp:
+                ftp.login(config['username'], config['password'])
+                remote = self._get_remote_file_info(ftp, config['file_path'])
+        except ftplib.all_errors as e:
+            _logger.error("FTP Error: %s", str(e))
+            raise UserError(_('FTP download failed: %s') % str(e))
+
+        if remote['size'] is not None:
+            _logger.info("Catalogue file size: %s bytes", remote['size'])
+
+        source_key = self._get_remote_source_key(remote)
+        if source_key and not force and self.env['esprinet.catalogue.run']._is_imported(source_key):
+            _logger.info(
+                "Catalogue %s unchanged since the last import, skipping download",
+                config['file_path']
+            )
+            return config, remote, local_path, 'unchanged'
+
+        # A cached copy (complete or partial) is only reused if it belongs
+        # to the same remote file version
+        if not source_key or self._read_cache_source(local_path) != source_key:
+            self._reset_catalogue_cache(local_path, source_key)
+        elif os.path.exists(local_path):
+            _logger.info("Using cached catalogue file %s", local_path)
+            return config, remote, local_path, 'cached'
+        return config, remote, local_path, 'download'
+
+    def _transfer_catalogue(self, config, remote, local_path, on_chunk=None, profile=None):
+        """
+        Download the catalogue into the local cache, reconnecting and
+        resuming from the bytes already received when the transfer drops.
+        It does not use the environment, so it can run in another thread
+        :param on_chunk: called once with every chunk of the file in order,
+            starting with those of a partial download already in the cache
+        :raises: the last FTP error if every attempt fails
+        """
+        partial_path = local_path + '.part'
+        fed = 0
+
+        def feed(chunk, position):
+            # A transfer restarted from zero (server without REST) sends
+            # again bytes that on_chunk already got
+            nonlocal fed
+            if position < fed:
+                chunk = chunk[fed - position:]
+            if chunk:
+                on_chunk(chunk)
+                fed += len(chunk)
+
+        if on_chunk and os.path.exists(partial_path):
+            with open(partial_path, 'rb') as partial_file:
+                for chunk in iter_file_chunks(partial_file, FTP_BLOCK_SIZE):
+                    feed(chunk, fed)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with self._connect_ftp(config) as ftp:
+                    ftp.login(config['username'], config['password'])
+                    self._retrieve_catalogue(ftp, remote, partial_path, feed if on_chunk else None, profile)
+                break
+            except ftplib.error_perm:
+                raise
+            except ftplib.all_errors as e:
+                if attempt >= FTP_DOWNLOAD_ATTEMPTS:
+                    raise
+                _logger.warning(
+                    "FTP transfer interrupted (%s), retrying (%s/%s)",
+                    str(e),
+                    attempt,
+                    FTP_DOWNLOAD_ATTEMPTS - 1
                 )
-                return temp_file_path
+                time.sleep(FTP_RETRY_DELAY * attempt)
+
+        os.replace(partial_path, local_path)
+        _logger.info(
+            "Download completed successfully to %s",
+            local_path
+        )
+        return local_path
 
+    def _download_catalogue_file(self, force=False, profile=None):
+        """
+        Download Catalogue.json from FTP server into the local cache. The
+        download is skipped when the remote SIZE and MDTM match the last
+        imported file, a complete cached copy of the same file is reused,
+        and an interrupted transfer resumes with a REST offset
+        :param force: download even if the file was already imported
+        :return: (local path or None if unchanged, remote file info from
+            _get_remote_file_info)
+        """
+        config, remote, local_path, state = self._prepare_catalogue_download(force)
+        if state == 'unchanged':
+            return None, remote
+        if state == 'cached':
+            return local_path, remote
+        return self._fetch_catalogue_file(config, remote, local_path, profile), remote
+
+    def _fetch_catalogue_file(self, config, remote, local_path, profile=None):
+        """_transfer_catalogue with its errors reported as UserError"""
+        try:
+            return self._transfer_catalogue(config, remote, local_path, profile=profile)
         except ftplib.all_errors as e:
-            temp_file.close()
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
             _logger.error("FTP Error: %s", str(e))
             raise UserError(_('FTP download failed: %s') % str(e))
         except Exception as e:
-            temp_file.close()
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
             _logger.error("Download Error: %s", str(e))
             raise UserError(_('Download failed: %s') % str(e))
 
+    def _iter_pipelined_download(self, config, remote, local_path, profile=None):
+        """
+        Download the catalogue in a background thread and yield its chunks
+        as they arrive, through a queue of at most PIPELINE_BUFFER_CHUNKS
+        chunks so a slow import holds the download back instead of
+        buffering the file in memory. The file is still written to the
+        cache, so an interrupted run can resume. Closing the generator
+        cancels the download
+        """
+        chunk_queue = queue.Queue(maxsize=PIPELINE_BUFFER_CHUNKS)
+        cancelled = threading.Event()
+
+        def put(item):
+            while not cancelled.is_set():
+                try:
+                    chunk_queue.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def on_chunk(chunk):
+            if not put(chunk):
+                raise DownloadCancelled()
+
+        def download():
+            try:
+                self._transfer_catalogue(config, remote, local_path, on_chunk, profile)
+            except DownloadCancelled:
+                return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+
+        downloader = threading.Thread(target=download, name='esprinet-catalogue-download', daemon=True)
+        downloader.start()
+        try:
+            while True:
+                item = chunk_queue.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            downloader.join()
+
     def _debug_json_structure(self, file_path):
         """Debug the JSON structure to understand the format"""
         try:
@@ -103,217 +435,1065 @@ class EsprinetCatalogueService(models.AbstractModel):
         except Exception as e:
             _logger.error("Error debugging JSON structure: %s", str(e))
 
-    def _process_catalogue_file(self, file_path):
+    def _get_reference_resolver(self):
+        """Reference data (taxes, categories, supplier, margin) for an import"""
+        return ReferenceResolver(self)
+
+    def _build_product_index(self):
+        """
+        Load the default_code, barcode and last imported fingerprint of
+        every active product once, so catalogue rows are matched in memory
+        instead of with one search per row
+        """
+        Product = self.env['product.product']
+        Product.flush_model(['default_code', 'barcode', 'active', 'esprinet_catalogue_fingerprint'])
+        self.env.cr.execute("""
+            SELECT id, default_code, barcode, esprinet_catalogue_fingerprint
+              FROM product_product
+             WHERE active
+               AND (default_code IS NOT NULL OR barcode IS NOT NULL)
+          ORDER BY id
+        """)
+        index = ProductIndex()
+        for product_id, code, barcode, fingerprint in self.env.cr.fetchall():
+            index.add(code, barcode, product_id, fingerprint)
+        _logger.info("Indexed %s existing product codes", len(index))
+        return index
+
+    def _is_delta_import(self):
+        """
+        Whether existing products are updated from the catalogue (only
+        the rows whose fingerprint changed) or just skipped
+        """
+        return not self.env['ir.config_parameter'].sudo().get_param(
+            'esprinet_connector.catalogue_skip_existing'
+        )
+
+    def _get_catalogue_workers(self):
+        """Number of partitions (and worker threads) of a catalogue import"""
+        value = self.env['ir.config_parameter'].sudo().get_param(
+            'esprinet_connector.catalogue_workers',
+            default=1
+        )
+        try:
+            return max(1, int(value))
+        except (TypeError, ValueError):
+            _logger.warning("Invalid catalogue workers value: %s", value)
+            return 1
+
+    def _get_catalogue_source(self, file_path, remote=None):
+        """
+        Identity of the catalogue file for resuming interrupted runs: the
+        remote path, size and modification time when the FTP server
+        reports them (see _get_remote_file_info), otherwise a hash of the
+        downloaded content
+        """
+        remote = remote or {}
+        file_name = remote.get('path') or os.path.basename(file_path)
+        file_size = remote.get('size')
+        if file_size is None:
+            file_size = os.path.getsize(file_path)
+        modified = remote.get('modified')
+        source_key = self._get_remote_source_key(remote)
+        if not source_key:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(file_path, 'rb') as file:
+                for chunk in iter_file_chunks(file):
+                    digest.update(chunk)
+            source_key = 'content:%s' % digest.hexdigest()
+        return {
+            'source_key': source_key,
+            'file_name': file_name,
+            'file_size': file_size,
+            'file_modified': modified or False,
+        }
+
+    def _acquire_catalogue_lock(self):
+        """
+        Take the session-level lock that allows a single catalogue import
+        at a time. The lock lives in its own connection, so it is released
+        if the worker dies, and an unfinished run can be resumed safely
+        :return: the cursor holding the lock, or None if another import
+            is running
+        """
+        cr = self.env.registry.cursor()
+        try:
+            cr.execute("SELECT pg_try_advisory_lock(%s)", (CATALOGUE_LOCK_ID,))
+            if cr.fetchone()[0]:
+                cr.commit()
+                return cr
+        except Exception:
+            cr.close()
+            raise
+        cr.close()
+        return None
+
+    def _release_catalogue_lock(self, cr):
+        try:
+            cr.execute("SELECT pg_advisory_unlock(%s)", (CATALOGUE_LOCK_ID,))
+            cr.commit()
+        finally:
+            cr.close()
+
+    def _process_catalogue_file(self, file_path, source=None, chunks=None, profile=None):
         """
         Process the downloaded JSON file with streaming to handle large
-        files
+        files. The progress is checkpointed in an esprinet.catalogue.run
+        record, and a run interrupted before the end is resumed from its
+        last committed batch when the same file is processed again
+        :param source: identity of the file (see _get_catalogue_source)
+        :param chunks: content of the file while it is being downloaded
+            (see _iter_pipelined_download) instead of reading file_path;
+            source is then required
+        :param profile: CatalogueProfile of the run, saved on its record;
+            a new one is started if not given
         """
+        lock_cr = None
+        run = None
+        profile = profile or self._new_catalogue_profile()
         try:
-            _logger.info("Starting to process catalogue file: %s", file_path)
+            _logger.info("Starting to process catalogue file: %s (transform: %s)", file_path, TRANSFORM_BACKEND)
+
+            if chunks is None:
+                if not os.path.exists(file_path):
+                    _logger.error("File does not exist: %s", file_path)
+                    return 0
+
+                if os.path.getsize(file_path) == 0:
+                    _logger.error("File is empty: %s", file_path)
+                    return 0
+
+                if not os.access(file_path, os.R_OK):
+                    _logger.error("No read permissions for file: %s", file_path)
+                    return 0
+
+            lock_cr = self._acquire_catalogue_lock()
+            if lock_cr is None:
+                _logger.warning("Another catalogue import is running, skipping this one")
+                return 0
+
+            if chunks is None:
+                # First, let's examine the JSON structure
+                self._debug_json_structure(file_path)
+
+            source = source or self._get_catalogue_source(file_path)
+            run = self.env['esprinet.catalogue.run']._start_run(
+                source,
+                self._get_catalogue_workers(),
+                self._get_catalogue_engine()
+            )
+            self.env.cr.commit()
+            if run.attempts > 1:
+                _logger.info(
+                    "Resuming catalogue run %s (attempt %s) from %s committed rows",
+                    run.id,
+                    run.attempts,
+                    sum(run.checkpoint_ids.mapped('processed'))
+                )
 
-            # First, let's examine the JSON structure
-            self._debug_json_structure(file_path)
+            # Taxes, categories, supplier and margin, loaded once per import
+            resolver = self._get_reference_resolver()
+            product_index = self._build_product_index()
+            update_existing = self._is_delta_import()
+
+            staged = Counter()
+            with ExitStack() as stack:
+                if chunks is None:
+                    chunks = iter_file_chunks(stack.enter_context(open(file_path, 'rb')))
+                # Products are decoded one by one while the file is read,
+                # so memory does not depend on its size
+                rows = profile.iter_rows(iter_array_items(chunks))
+
+                if run.engine == 'staging':
+                    # Only new and changed rows go through the ORM
+                    with profile.phase('staging'):
+                        staged = self._stage_catalogue_rows(rows, run, resolver, update_existing)
+                    rows = profile.iter_rows(
+                        self._iter_staged_rows(('new', 'changed') if update_existing else ('new',)),
+                        'staging',
+                        count=False
+                    )
 
-            # Get or create Esprinet supplier
-            esprinet_supplier = self._get_or_create_esprinet_supplier()
+                if run.partitions > 1:
+                    results = self._process_catalogue_partitions(
+                        rows,
+                        run,
+                        resolver,
+                        product_index,
+                        update_existing,
+                        profile
+                    )
+                else:
+                    _logger.info("Streaming JSON array of products...")
+                    results = self._import_catalogue_rows(
+                        rows,
+                        resolver,
+                        product_index,
+                        update_existing,
+                        run._get_checkpoint(0),
+                        profile
+                    )
 
-            products_processed = 0
-            products_created = 0
+            # New snapshot: partitions commit their checkpoints from
+            # their own cursors
+            self.env.cr.commit()
+            run.invalidate_recordset()
+            run.checkpoint_ids.invalidate_recordset()
+            finished = all(run.checkpoint_ids.mapped('done'))
+            run._finish_run(
+                'done' if finished else 'failed',
+                None if finished else _('Import stopped before the end of the file'),
+                staged
+            )
+            self._save_catalogue_profile(run, profile)
+            self.env.cr.commit()
+            results.update(staged)
 
-            if not os.path.exists(file_path):
-                _logger.error("File does not exist: %s", file_path)
-                return products_created
+            if results['processed'] == 0:
+                _logger.error("No products processed from JSON")
+                return results['created']
 
-            if os.path.getsize(file_path) == 0:
-                _logger.error("File is empty: %s", file_path)
-                return products_created
+            resolver.log_stats()
+            _logger.info(
+                "Work completed. Processed: %s, Created: %s, Updated: %s, Unchanged: %s, Skipped: %s, Errors: %s",
+                results['processed'],
+                results['created'],
+                results['updated'],
+                results['unchanged'],
+                results['skipped'],
+                results['error']
+            )
 
-            if not os.access(file_path, os.R_OK):
-                _logger.error("No read permissions for file: %s", file_path)
-                return products_created
+            return results['created']
 
-            with open(file_path, 'r', encoding='utf-8') as file:
-                try:
-                    _logger.info("Loading JSON file...")
-                    products_data = json.load(file)
+        except CatalogueMemoryLimit as e:
+            self.env.cr.rollback()
+            run._finish_run('failed', e)
+            self._save_catalogue_profile(run, profile)
+            self.env.cr.commit()
+            if self._resume_catalogue_later():
+                _logger.warning("%s: the import resumes from its last checkpoint in a new run", str(e))
+            else:
+                _logger.warning("%s: the import resumes from its last checkpoint with the next import", str(e))
+            return 0
 
-                    if not isinstance(products_data, list):
-                        _logger.error(
-                            "Expected JSON array, got %s",
-                            type(products_data)
-                        )
-                        return products_created
+        except Exception as e:
+            _logger.error("Error processing catalogue file: %s", str(e))
+            if run:
+                self.env.cr.rollback()
+                run._finish_run('failed', e)
+                self._save_catalogue_profile(run, profile)
+                self.env.cr.commit()
+            raise UserError(_('Catalogue processing failed: %s') % str(e))
+        finally:
+            if lock_cr is not None:
+                self._release_catalogue_lock(lock_cr)
 
-                    _logger.info(
-                        "Processing JSON array of %s products...",
-                        len(products_data)
-                    )
+    def _new_catalogue_profile(self):
+        """CatalogueProfile for a run, with cProfile if enabled in the settings"""
+        return CatalogueProfile(cprofile=bool(self.env['ir.config_parameter'].sudo().get_param(
+            'esprinet_connector.catalogue_cprofile'
+        )))
 
-                    for product_data in products_data:
-                        try:
+    def _save_catalogue_profile(self, run, profile):
+        """
+        Store the phase profile of this attempt on the run and log it. A
+        failure here is only logged, it never fails the import
+        """
+        try:
+            summary = profile.summary()
+            with self.env.cr.savepoint():
+                run._save_profile(summary, profile.slowest_dump())
+            _logger.info(
+                "Catalogue import profile: %s rows in %.1f s (%.0f rows/s); %s",
+                summary['rows'],
+                summary['duration'],
+                summary['rows_per_second'],
+                ', '.join(
+                    '%s %.1f s' % (phase, seconds)
+                    for phase, seconds in sorted(summary['seconds'].items(), key=lambda item: -item[1])
+                )
+            )
+        except Exception as e:
+            _logger.warning("Could not save the catalogue import profile: %s", str(e))
+
+    def _get_catalogue_engine(self):
+        """
+        'orm' imports every row through the ORM; 'staging' loads the
+        catalogue with COPY and only sends the deltas to the ORM
+        """
+        engine = self.env['ir.config_parameter'].sudo().get_param(
+            'esprinet_connector.catalogue_engine',
+            default='orm'
+        )
+        return engine if engine in ('orm', 'staging') else 'orm'
+
+    def _stage_catalogue_rows(self, rows, run, resolver, update_existing):
+        """
+        Load the catalogue rows into esprinet.catalogue.staging with COPY,
+        classify them against the existing products in SQL and retire the
+        catalogue products that vanished from the feed. The load is all or
+        nothing: an invalid file leaves the previous staging untouched. A
+        resumed run reuses the staging it already loaded, so the delta rows
+        and the checkpoint offsets stay the same
+        :return: Counter of the rows resolved in SQL ('processed',
+            'unchanged' and 'skipped'), which never reach the ORM
+        """
+        cr = self.env.cr
+        if not run.staging_loaded:
+            started = time.monotonic()
+            margin = resolver.margin
+            cr.execute("TRUNCATE esprinet_catalogue_staging")
+            cr.copy_expert(
+                "COPY esprinet_catalogue_staging (%s) FROM STDIN WITH (FORMAT csv)" % ', '.join(STAGING_COLUMNS),
+                CopyReader(iter_copy_chunks(
+                    staging_record(row, run.id, margin) for row in rows
+                ))
+            )
+            cr.execute("ANALYZE esprinet_catalogue_staging")
+            self._classify_staged_catalogue()
+            vanished = self._retire_vanished_products() if update_existing else 0
+            run.write({'staging_loaded': True, 'vanished': vanished})
+            cr.commit()
+            _logger.info("Catalogue staged and classified in %.1f s", time.monotonic() - started)
+
+        cr.execute("SELECT delta, count(*) FROM esprinet_catalogue_staging GROUP BY delta")
+        deltas = Counter(dict(cr.fetchall()))
+        _logger.info("Catalogue staging deltas: %s", dict(deltas))
+
+        staged = Counter(
+            unchanged=deltas['unchanged'],
+            skipped=deltas['duplicate'] + deltas['invalid'],
+        )
+        if not update_existing:
+            staged['skipped'] += staged.pop('unchanged') + deltas['changed']
+        staged['processed'] = sum(staged.values())
+        return staged
+
+    def _classify_staged_catalogue(self):
+        """
+        Set the delta of every staged row with set-based SQL, matching
+        products like the ORM import does: by the reference they are
+        stored with (see product_code) first, then by barcode, the first
+        row of each reference, barcode or product winning
+        """
+        self.env['product.product'].flush_model(
+            ['default_code', 'barcode', 'active', 'esprinet_catalogue_fingerprint']
+        )
+        cr = self.env.cr
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging
+               SET delta = 'invalid'
+             WHERE default_code IS NULL
+        """)
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging s
+               SET delta = 'duplicate'
+              FROM (
+                    SELECT id, row_number() OVER (PARTITION BY default_code ORDER BY id) AS position
+                      FROM esprinet_catalogue_staging
+                     WHERE delta IS NULL
+                   ) d
+             WHERE s.id = d.id
+               AND d.position > 1
+        """)
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging s
+               SET product_id = p.id
+              FROM (
+                    SELECT DISTINCT ON (default_code) id, default_code
+                      FROM product_product
+                     WHERE active AND default_code IS NOT NULL
+                  ORDER BY default_code, id
+                   ) p
+             WHERE s.delta IS NULL
+               AND p.default_code = s.default_code
+        """)
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging s
+               SET product_id = p.id
+              FROM (
+                    SELECT DISTINCT ON (barcode) id, barcode
+                      FROM product_product
+                     WHERE active AND barcode IS NOT NULL
+                  ORDER BY barcode, id
+                   ) p
+             WHERE s.delta IS NULL
+               AND s.product_id IS NULL
+               AND p.barcode = s.ean
+        """)
+        # A product or a barcode matched by several rows: the first wins
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging s
+               SET delta = 'duplicate'
+              FROM (
+                    SELECT id,
+                           row_number() OVER (PARTITION BY product_id ORDER BY id) AS product_position,
+                           row_number() OVER (PARTITION BY ean ORDER BY id) AS ean_position,
+                           product_id,
+                           ean
+                      FROM esprinet_catalogue_staging
+                     WHERE delta IS NULL
+                   ) d
+             WHERE s.id = d.id
+               AND ((d.product_id IS NOT NULL AND d.product_position > 1)
+                    OR (d.product_id IS NULL AND d.ean IS NOT NULL AND d.ean_position > 1))
+        """)
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging s
+               SET delta = CASE
+                       WHEN p.esprinet_catalogue_fingerprint = s.fingerprint THEN 'unchanged'
+                       ELSE 'changed'
+                   END
+              FROM product_product p
+             WHERE s.delta IS NULL
+               AND p.id = s.product_id
+        """)
+        cr.execute("""
+            UPDATE esprinet_catalogue_staging
+               SET delta = 'new'
+             WHERE delta IS NULL
+        """)
+        self.env['esprinet.catalogue.staging'].invalidate_model()
+
+    def _retire_vanished_products(self):
+        """
+        Products imported from an earlier catalogue that are no longer in
+        the staged one lose their supplier stock and stop being sold and
+        purchased, like a product without stock. Their fingerprint is
+        cleared so they are updated if they come back. Nothing is retired
+        if more than CATALOGUE_VANISHED_MAX_RATIO of them vanished at once,
+        which points to an incomplete feed rather than to real removals.
+        A product whose reference is still in the feed is kept even if its
+        row was skipped as a duplicate
+        :return: number of products retired
+        """
+        cr = self.env.cr
+        cr.execute("""
+            SELECT p.id
+              FROM product_product p
+             WHERE p.active
+               AND p.esprinet_catalogue_fingerprint IS NOT NULL
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM esprinet_catalogue_staging s
+                     WHERE s.product_id = p.id
+                   )
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM esprinet_catalogue_staging s
+                     WHERE s.default_code = p.default_code
+                   )
+          ORDER BY p.id
+        """)
+        vanished_ids = [row[0] for row in cr.fetchall()]
+        if not vanished_ids:
+            return 0
+
+        cr.execute("""
+            SELECT count(*)
+              FROM product_product
+             WHERE active AND esprinet_catalogue_fingerprint IS NOT NULL
+        """)
+        catalogue_products = cr.fetchone()[0]
+        if len(vanished_ids) > catalogue_products * CATALOGUE_VANISHED_MAX_RATIO:
+            _logger.warning(
+                "%s of %s catalogue products missing from the feed, not retiring them",
+                len(vanished_ids),
+                catalogue_products
+            )
+            return 0
+
+        Product = self.env['product.product']
+        for start in range(0, len(vanished_ids), CATALOGUE_BATCH_SIZE):
+            Product.browse(vanished_ids[start:start + CATALOGUE_BATCH_SIZE]).write({
+                'supplier_stock_qty': 0.0,
+                'purchase_ok': False,
+                'sale_ok': False,
+                'esprinet_catalogue_fingerprint': False,
+            })
+        _logger.info("Retired %s products no longer in the catalogue", len(vanished_ids))
+        return len(vanished_ids)
+
+    def _iter_staged_rows(self, deltas):
+        """Original rows of the staged catalogue with the given deltas, in file order"""
+        last_id = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT id, payload
+                  FROM esprinet_catalogue_staging
+                 WHERE delta IN %s
+                   AND id > %s
+              ORDER BY id
+                 LIMIT %s
+            """, (tuple(deltas), last_id, CATALOGUE_BATCH_SIZE))
+            page = self.env.cr.fetchall()
+            if not page:
+                return
+            for row_id, payload in page:
+                yield codec.loads(payload)
+            last_id = page[-1][0]
+
+    def _import_catalogue_rows(self, rows, resolver, product_index, update_existing, checkpoint=None,
+                               profile=None):
+        """
+        Create or update the products of an iterable of catalogue rows,
+        committing every CATALOGUE_BATCH_SIZE rows. The numeric values of
+        each block of rows are computed at once (see transform_rows) and
+        a row with an invalid number is counted as an error, unless it
+        needs no write. With a checkpoint
+        (esprinet.catalogue.checkpoint) the rows it already committed are
+        skipped, and the progress is saved in the same transaction as
+        each batch; it is marked done once every row has been read
+        :return: Counter with the 'processed' rows, the result of each row
+            (see _process_single_product) and the 'created' and 'updated'
+            products, including those of the checkpoint
+        """
+        profile = profile or CatalogueProfile()
+        supplier = resolver.supplier
+        results = Counter()
+        pending = self._new_pending_batch()
+        last_sku = None
+
+        if checkpoint:
+            if checkpoint.done:
+                return Counter(checkpoint._get_counters())
+            results.update(checkpoint._get_counters())
+            rows = itertools.islice(rows, results['processed'], None)
+
+        try:
+            for chunk in iter_row_chunks(rows, CATALOGUE_BATCH_SIZE):
+                with profile.phase('transform'):
+                    chunk_values = transform_rows(chunk, resolver.margin)[0]
+                for product_data, values in zip(chunk, chunk_values):
+                    results['processed'] += 1
+                    last_sku = row_key(product_data) or last_sku
+                    try:
+                        with profile.phase('match'):
                             result = self._process_single_product(
                                 product_data,
-                                esprinet_supplier
-                            )
-                            products_processed += 1
-
-                            if result == 'created':
-                                products_created += 1
-
-                            if products_processed % 500 == 0:
-                                self.env.cr.commit()
-                                _logger.info(
-                                    "Processed %s products...",
-                                    products_processed
-                                )
-
-                        except Exception as e:
-                            _logger.error(
-                                "Error processing product %s: %s",
-                                products_processed,
-                                str(e)
+                                supplier,
+                                product_index,
+                                pending,
+                                resolver,
+                                update_existing,
+                                values,
+                                profile
                             )
-                            continue
+                        results[result] += 1
+                    except Exception as e:
+                        results['error'] += 1
+                        profile.error(e)
+                        _logger.error(
+                            "Error processing product %s: %s",
+                            results['processed'],
+                            str(e)
+                        )
 
-                    if products_processed == 0:
-                        _logger.error("No products processed from JSON")
-                        return products_created
+                    # Each commit creates and updates the products queued
+                    # since the previous one in batches
+                    if results['processed'] % CATALOGUE_BATCH_SIZE == 0:
+                        results.update(self._flush_pending_batch(supplier, pending, profile))
+                        with profile.phase('commit'):
+                            if checkpoint:
+                                checkpoint._save(results, last_sku)
+                            self.env.cr.commit()
+                            self._check_catalogue_memory(results['processed'])
+
+        except ValueError as e:
+            # Truncated or invalid file: keep what was read, the run stays
+            # unfinished and resumes from here with the next download
+            _logger.error("Invalid JSON file: %s", str(e))
+            profile.error(e)
+            results.update(self._flush_pending_batch(supplier, pending, profile))
+            with profile.phase('commit'):
+                if checkpoint:
+                    checkpoint._save(results, last_sku)
+                self.env.cr.commit()
+            return results
+
+        results.update(self._flush_pending_batch(supplier, pending, profile))
+        with profile.phase('commit'):
+            if checkpoint:
+                checkpoint._save(results, last_sku, done=True)
+            self.env.cr.commit()
+        _logger.info("Final commit completed successfully")
+
+        return results
+
+    def _get_catalogue_memory_limit(self):
+        """
+        Memory (bytes) the import may use, or 0 without limit. Odoo only
+        enforces limit_memory_soft in multi-process mode (workers > 0), so
+        threaded servers, which report the vms of the whole process, have
+        no limit
+        """
+        if not tools.config.get('workers'):
+            return 0
+        return int((tools.config.get('limit_memory_soft') or 0) * CATALOGUE_MEMORY_RATIO)
 
-                except json.JSONDecodeError as e:
-                    _logger.error("Invalid JSON file: %s", str(e))
-                    return products_created
-                except Exception as e:
-                    _logger.error("Error processing JSON file: %s", str(e))
-                    return products_created
+    def _check_catalogue_memory(self, processed):
+        """
+        Called after each commit: drop the ORM cache (records, prefetch
+        sets and computed values of the committed batch) and log the
+        memory watermark
+        :raises CatalogueMemoryLimit: if the worker is still close to
+            limit_memory_soft; the batch is already committed and
+            checkpointed, so a new run resumes right after it
+        """
+        self.env.invalidate_all()
+        rss, watched = memory_usage()
+        limit = self._get_catalogue_memory_limit()
+        _logger.info(
+            "Processed %s products... (memory: %s, peak %s, limit %s)",
+            processed,
+            format_mib(rss),
+            format_mib(peak_rss()),
+            format_mib(limit or None)
+        )
+        if limit and watched and watched > limit:
+            gc.collect()
+            watched = memory_usage()[1]
+            if watched and watched > limit:
+                raise CatalogueMemoryLimit(
+                    _('Worker memory %s above %s after %s products') % (
+                        format_mib(watched), format_mib(limit), processed)
+                )
+
+    def _resume_catalogue_later(self):
+        """Trigger the catalogue cron, which resumes the unfinished run"""
+        cron = self.env.ref('esprinet_connector.ir_cron_download_esprinet_catalogue', raise_if_not_found=False)
+        if cron and cron.active:
+            cron._trigger()
+            return True
+        return False
 
-            # Final commit only if we processed products successfully
-            if products_processed > 0:
+    def _process_catalogue_partitions(self, rows, run, resolver, product_index, update_existing, profile=None):
+        """
+        Split the catalogue rows by a hash of their product reference into
+        the partitions of the run and import them in parallel, each worker
+        with its own cursor, commits and checkpoint. Reference data
+        (supplier, taxes and categories) is resolved while splitting and
+        committed before the workers start, so they never create it
+        concurrently. If the file turns out to be truncated or invalid, the
+        rows spooled before the error are still imported, and like in
+        _import_catalogue_rows the checkpoints are left unfinished
+        :return: Counter merged from every partition
+        """
+        spool_dir = tempfile.mkdtemp(prefix='esprinet_catalogue_')
+        profile = profile or CatalogueProfile()
+        try:
+            # The supplier is created (if missing) and committed with the
+            # rest of the reference data, before any worker browses it
+            resolver.supplier
+            parse_error = None
+            with profile.phase('partition'), PartitionSpool(spool_dir, run.partitions) as spool:
+                _logger.info("Splitting catalogue into %s partitions...", run.partitions)
                 try:
-                    self.env.cr.commit()
-                    _logger.info("Final commit completed successfully")
-                except Exception as e:
-                    _logger.error("Error in final commit: %s", str(e))
-                    self.env.cr.rollback()
+                    for product_data in rows:
+                        resolver.warm(product_data)
+                        spool.write(product_data)
+                except ValueError as e:
+                    # Truncated or invalid file: import what was read, each
+                    # partition stops with this error after its last row
+                    _logger.error("Invalid JSON file: %s", str(e))
+                    parse_error = str(e)
+            with profile.phase('commit'):
+                self.env.cr.commit()
+            _logger.info("Catalogue partitions: %s rows", spool.counts)
+
+            results = Counter()
+            memory_limit = None
+            with ThreadPoolExecutor(max_workers=run.partitions) as executor:
+                futures = [
+                    executor.submit(
+                        self._import_catalogue_partition,
+                        partition,
+                        spool_path,
+                        run._get_checkpoint(partition).id,
+                        resolver,
+                        product_index,
+                        update_existing,
+                        profile,
+                        parse_error
+                    )
+                    for partition, spool_path in enumerate(spool.paths)
+                ]
+                for partition, future in enumerate(futures):
+                    try:
+                        partition_results, partition_resolver = future.result()
+                    except CatalogueMemoryLimit as e:
+                        _logger.warning("Catalogue partition %s stopped: %s", partition, str(e))
+                        memory_limit = e
+                        continue
+                    except Exception as e:
+                        _logger.error("Catalogue partition %s failed: %s", partition, str(e))
+                        results['failed_partitions'] += 1
+                        continue
+                    results.update(partition_results)
+                    resolver.merge_stats(partition_resolver)
+            if memory_limit:
+                raise memory_limit
+            return results
+
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
 
+    def _import_catalogue_partition(self, partition, spool_path, checkpoint_id, resolver, product_index,
+                                    update_existing, profile=None, parse_error=None):
+        """
+        Import one partition in a worker thread with its own cursor
+        :param parse_error: message of the error that stopped the split of
+            the file, raised as a ValueError after the last spooled row so
+            the partition is checkpointed but not marked done
+        :return: (results Counter, the worker's reference resolver)
+        """
+        def iter_rows(spool_file):
+            yield from iter_spool(spool_file)
+            if parse_error:
+                raise ValueError(parse_error)
+
+        with self.env.registry.cursor() as cr:
+            service = self.with_env(api.Environment(cr, SUPERUSER_ID, self.env.context))
+            partition_resolver = resolver.fork(service)
+            with open(spool_path, 'rb') as spool_file:
+                results = service._import_catalogue_rows(
+                    iter_rows(spool_file),
+                    partition_resolver,
+                    product_index,
+                    update_existing,
+                    service.env['esprinet.catalogue.checkpoint'].browse(checkpoint_id),
+                    profile
+                )
             _logger.info(
-                "Work completed. Processed: %s, Created: %s, Updated: %s",
-                products_processed,
-                products_created
+                "Catalogue partition %s done. Processed: %s, Created: %s, Updated: %s",
+                partition,
+                results['processed'],
+                results['created'],
+                results['updated']
             )
+            return results, partition_resolver
 
-            return products_created
+    def _new_pending_batch(self):
+        """Products waiting to be created or updated at the next commit"""
+        return {'create': [], 'update': []}
 
-        except Exception as e:
-            _logger.error("Error processing catalogue file: %s", str(e))
-            raise UserError(_('Catalogue processing failed: %s') % str(e))
-
-    def _process_single_product(self, product_data, supplier):
-        """Process a single product from the catalogue"""
+    def _flush_pending_batch(self, supplier, pending, profile=None):
+        """
+        Create and update the queued products
+        :return: Counter with the number of 'created' and 'updated'
+            products and the queued rows that failed ('error')
+        """
+        profile = profile or CatalogueProfile()
+        with profile.phase('create'):
+            counts = self._create_products_batch(supplier, pending['create'], profile)
+        with profile.phase('update'):
+            counts.update(self._update_products_batch(supplier, pending['update'], profile))
+        pending['create'] = []
+        pending['update'] = []
+        return counts
+
+    def _process_single_product(self, product_data, supplier, product_index=None, pending=None,
+                                resolver=None, update_existing=False, values=None, profile=None):
+        """
+        Process a single product from the catalogue. With a product_index
+        (see _build_product_index) existing products are matched in memory
+        and the index is updated with the new product. With a pending batch
+        (see _new_pending_batch) the prepared values are queued there for
+        _flush_pending_batch instead of being written right away ('queued'
+        is returned)
+        :return: 'created', 'updated', 'unchanged', 'skipped', 'queued'
+            or 'error'
+        """
         try:
-            _logger.debug(
-                "Processing product data: %s",
-                str(product_data)[:300]
+            action, prepared = self._prepare_catalogue_row(
+                product_data,
+                product_index,
+                resolver,
+                update_existing,
+                values
             )
+            if action not in ('create', 'update'):
+                return action
+            if pending is not None:
+                pending[action].append(prepared)
+                return 'queued'
+            if action == 'create':
+                counts = self._create_products_batch(supplier, [prepared], profile)
+                return 'error' if counts['error'] else 'created'
+            counts = self._update_products_batch(supplier, [prepared], profile)
+            return 'error' if counts['error'] else 'updated'
 
-            sku = product_data.get('SKU')
-            name = product_data.get('Description')
-            barcode = product_data.get('EAN')
-            part_number = product_data.get('PartNumber')
-
-            if not sku and part_number:
-                sku = part_number
+        except Exception as e:
+            _logger.error("Error in _process_single_product: %s", str(e))
+            if profile is not None:
+                profile.error(e)
+            return 'error'
 
-            if not sku:
-                _logger.warning(
-                    "Product without SKU found, available keys: %s",
-                    list(product_data.keys())
-                )
-                return 'skipped'
+    def _transform_catalogue_row(self, product_data, resolver):
+        """
+        Numeric values of a single row (see transform_rows)
+        :raises InvalidRow: if a required numeric column is not a number
+        """
+        values = transform_rows([product_data], resolver.margin, backend='python')[0][0]
+        if isinstance(values, InvalidRow):
+            raise values
+        return values
 
-            _logger.debug("Processing product SKU: %s, Name: %s", sku, name)
+    def _prepare_catalogue_row(self, product_data, product_index=None, resolver=None, update_existing=False,
+                               values=None):
+        """
+        Decide what to do with a catalogue row and prepare its values
+        :param values: numeric values of the row from transform_rows, or
+            its InvalidRow, raised only if the row has to be written
+        :return: ('create', (product values, supplier price)),
+            ('update', (product id, product values, supplier price, fingerprint)),
+            ('unchanged', None) if the row has the fingerprint of the last
+            import, or ('skipped', None)
+        """
+        _logger.debug(
+            "Processing product data: %s",
+            str(product_data)[:300]
+        )
 
-            existing_product = self.env['product.product'].search([
-                '|',
-                ('default_code', '=', sku),
-                ('barcode', '=', barcode)
-            ], limit=1)
+        sku = product_data.get('SKU')
+        name = product_data.get('Description')
+        barcode = product_data.get('EAN')
+        part_number = product_data.get('PartNumber')
 
-            if existing_product:
-                return 'skipped'
+        if not sku and part_number:
+            sku = part_number
 
-            product_vals = self._get_product_vals(
-                product_data,
-                sku,
-                name,
-                barcode
+        if not sku:
+            _logger.warning(
+                "Product without SKU found, available keys: %s",
+                list(product_data.keys())
             )
+            return 'skipped', None
+
+        _logger.debug("Processing product SKU: %s, Name: %s", sku, name)
+
+        resolver = resolver or self._get_reference_resolver()
+        fingerprint = row_fingerprint(product_data, resolver.margin)
+        # Products are matched by the reference they are stored with (see
+        # _get_product_vals), not by the Esprinet SKU
+        code = product_code(product_data)
+
+        if product_index is not None:
+            exists, product_id = product_index.lookup(code, barcode)
+            stored_fingerprint = product_index.fingerprints.get(product_id)
+        else:
+            domain = [('default_code', '=', code)]
+            if barcode:
+                domain = ['|'] + domain + [('barcode', '=', barcode)]
+            product = self.env['product.product'].search(domain, limit=1)
+            exists, product_id = bool(product), product.id
+            stored_fingerprint = product.esprinet_catalogue_fingerprint
+
+        if exists:
+            # product_id is None for a repeated row of a product queued in
+            # this same import
+            if not update_existing or not product_id:
+                return 'skipped', None
+            # A product matched by several rows (by reference or barcode,
+            # maybe from different partitions): the first wins, like in the
+            # staging engine, so two workers never write the same product
+            if product_index is not None and not product_index.claim(product_id):
+                return 'skipped', None
+            if stored_fingerprint == fingerprint:
+                return 'unchanged', None
+            if product_index is not None:
+                product_index.fingerprints[product_id] = fingerprint
+
+        if isinstance(values, InvalidRow):
+            raise values
+        if values is None:
+            values = self._transform_catalogue_row(product_data, resolver)
+
+        product_vals = self._get_product_vals(
+            product_data,
+            sku,
+            name,
+            barcode,
+            resolver,
+            values
+        )
+        # Stock fields of the template go in the create values
+        product_vals['supplier_stock_qty'] = values['supplier_stock_qty']
+        product_vals['display_supplier_stock_in_website'] = True
+        product_vals['esprinet_catalogue_fingerprint'] = fingerprint
 
-            product = self.env['product.product'].create(product_vals)
-            price = product_data.get('StandardDealerPrice', 0.0)
-            fees = product_data.get('Fees', 0.0)
-            price = float(price) + float(fees)
-            self._update_supplier_info(product, supplier, price)
+        price = values['standard_price']
 
-            stock_qty = product_data.get('StockQty', 0.0)
-            product.product_tmpl_id.supplier_stock_qty = float(stock_qty)
-            product.product_tmpl_id.display_supplier_stock_in_website = True
+        if exists:
+            return 'update', (product_id, product_vals, price, fingerprint)
 
-            return 'created'
+        # Indexed before creation so repeated rows in the same batch are
+        # skipped as well. The check is repeated under the index lock: a
+        # worker of another partition may have queued the same reference
+        # or barcode since the lookup above
+        if product_index is not None and not product_index.reserve(code, barcode):
+            return 'skipped', None
 
+        return 'create', (product_vals, price)
+
+    def _create_products_batch(self, supplier, prepared, profile=None):
+        """
+        Create the prepared products and their supplier info with one
+        multi-create each. If the batch fails, its products are created
+        one by one so a single bad row does not discard the others
+        :param prepared: list of (product values, supplier price)
+        :return: Counter with the number of products 'created' and of
+            those that could not be created ('error')
+        """
+        if not prepared:
+            return Counter()
+        try:
+            with self.env.cr.savepoint():
+                self._create_products(supplier, prepared)
+            return Counter(created=len(prepared))
         except Exception as e:
-            _logger.error("Error in _process_single_product: %s", str(e))
-            return 'error'
+            if len(prepared) == 1:
+                _logger.error(
+                    "Error creating product %s: %s",
+                    prepared[0][0].get('default_code'),
+                    str(e)
+                )
+                if profile is not None:
+                    profile.error(e)
+                return Counter(error=1)
+            _logger.warning(
+                "Batch of %s products failed (%s), creating them one by one",
+                len(prepared),
+                str(e)
+            )
+        return sum((self._create_products_batch(supplier, [item], profile) for item in prepared), Counter())
 
-    def _get_product_vals(self, product_data, name, sku, barcode):
+    def _create_products(self, supplier, prepared):
+        products = self.env['product.product'].create([vals for vals, _price in prepared])
+        self.env['product.supplierinfo'].create([
+            {
+                'partner_id': supplier.id,
+                'product_id': product.id,
+                'product_name': product.name,
+                'product_code': product.default_code,
+                'product_tmpl_id': product.product_tmpl_id.id,
+                'price': price or 0.0,
+                'min_qty': 1.0,
+                'delay': 2,
+            }
+            for product, (_vals, price) in zip(products, prepared)
+        ])
+        return products
+
+    def _update_products_batch(self, supplier, prepared, profile=None):
         """
-        Prepare product values from product data
+        Write the catalogue changes of existing products, with the same
+        one-by-one fallback as _create_products_batch
+        :param prepared: list of (product id, product values, supplier
+            price, fingerprint)
+        :return: Counter with the number of products whose fields actually
+            changed ('updated') and of those that could not be written
+            ('error')
         """
-        supplier_price = product_data.get('StandardDealerPrice', 0.0)
-        fees = product_data.get('Fees', 0.0)
-        supplier_price = float(price) + float(fees)
-        params = self.env['ir.config_parameter'].sudo()
-        param_margin = params.get_param(
-            'esprinet_connector.sale_margin',
-            default=25.0
-        )
-        margin = float(param_margin)
-        cost = float(supplier_price) if supplier_price else 0.0
-        list_price = cost * (1 + margin / 100.0)
-        depth = product_data.get('Depth', 0.0)
-        length = product_data.get('Length', 0.0)
-        height = product_data.get('Height', 0.0)
-        volume = (float(depth) * float(length) * float(height)) / 1000
-        stock_qty = product_data.get('StockQty', 0.0)
+        if not prepared:
+            return Counter()
+        try:
+            with self.env.cr.savepoint():
+                return Counter(updated=self._update_products(supplier, prepared))
+        except Exception as e:
+            if len(prepared) == 1:
+                _logger.error(
+                    "Error updating product %s: %s",
+                    prepared[0][0],
+                    str(e)
+                )
+                if profile is not None:
+                    profile.error(e)
+                return Counter(error=1)
+            _logger.warning(
+                "Batch update of %s products failed (%s), updating them one by one",
+                len(prepared),
+                str(e)
+            )
+        return sum((self._update_products_batch(supplier, [item], profile) for item in prepared), Counter())
+
+    def _update_products(self, supplier, prepared):
+        products = self.env['product.product'].browse([item[0] for item in prepared])
+        supplierinfos = self.env['product.supplierinfo'].search([
+            ('product_tmpl_id', 'in', products.product_tmpl_id.ids),
+            ('partner_id', '=', supplier.id),
+        ])
+        supplierinfo_by_template = {}
+        for supplierinfo in supplierinfos:
+            supplierinfo_by_template.setdefault(supplierinfo.product_tmpl_id.id, supplierinfo)
+
+        updated = 0
+        for product, (_product_id, vals, price, fingerprint) in zip(products, prepared):
+            changes = self._diff_product_vals(product, vals)
+            if changes:
+                updated += 1
+            changes['esprinet_catalogue_fingerprint'] = fingerprint
+            product.write(changes)
+
+            supplierinfo = supplierinfo_by_template.get(product.product_tmpl_id.id)
+            if not supplierinfo:
+                self._update_supplier_info(product, supplier, price)
+            elif float_compare(supplierinfo.price, price or 0.0, precision_digits=6):
+                supplierinfo.price = price or 0.0
+        return updated
+
+    def _diff_product_vals(self, product, vals):
+        """Values of CATALOGUE_DELTA_FIELDS that differ from the product"""
+        changes = {}
+        for field_name in CATALOGUE_DELTA_FIELDS:
+            if field_name not in vals:
+                continue
+            new_value = vals[field_name]
+            field = product._fields[field_name]
+            current = product[field_name]
+            if field.type == 'many2many':
+                # Commands (6, 0, ids) from _get_product_vals
+                changed = set(current.ids) != set(new_value[0][2])
+            elif field.type == 'many2one':
+                changed = current.id != (new_value or False)
+            elif field.type == 'float':
+                changed = bool(float_compare(current or 0.0, new_value or 0.0, precision_digits=6))
+            else:
+                changed = (current or False) != (new_value or False)
+            if changed:
+                changes[field_name] = new_value
+        return changes
+
+    def _get_product_vals(self, product_data, sku, name, barcode, resolver=None, values=None):
+        """
+        Prepare product values from product data. Taxes, category and
+        margin come from the import's ReferenceResolver, and prices,
+        volume, weight and flags from the transform stage (values, see
+        transform_rows), computed for this row alone if not given
+        """
+        resolver = resolver or self._get_reference_resolver()
+        if values is None:
+            values = self._transform_catalogue_row(product_data, resolver)
         product_vals = {
             'name': name or f'Product {sku}',
             'default_code': sku,
             'barcode': barcode,
-            'standard_price': cost,
-            'list_price': list_price,
-            'volume': volume,
+            'standard_price': values['standard_price'],
+            'list_price': values['list_price'],
+            'volume': values['volume'],
             'type': 'product',
-            'purchase_ok': True if stock_qty > 0 else False,
-            'sale_ok': True if stock_qty > 0 else False,
+            'purchase_ok': values['purchase_ok'],
+            'sale_ok': values['sale_ok'],
         }
 
         grouping = product_data.get('Grouping')
 
         if grouping:
-            product_vals['categ_id'] = self._get_or_create_category(
-                grouping
-            )
+            product_vals['categ_id'] = resolver.category_id(grouping)
 
-        weight = product_data.get('GrossWeight')
-
-        if weight:
-            try:
-                product_vals['weight'] = float(weight)
-            except (ValueError, TypeError):
-                _logger.warning(
-                    "Invalid weight value for product %s: %s",
-                    sku,
-                    weight
-                )
+        if 'weight' in values:
+            product_vals['weight'] = values['weight']
 
         description = product_data.get('ExtendedDescription')
 
@@ -322,17 +1502,17 @@ class EsprinetCatalogueService(models.AbstractModel):
             product_vals['description_sale'] = description
             product_vals['description_purchase'] = description
 
-        part_number = product_data.get('PartNumber') or ''
-        if part_number != sku:
+        part_number = product_data.get('PartNumber')
+        if part_number and part_number != sku:
             product_vals['default_code'] = part_number
 
-        tax_supplier_id = self._get_or_create_tax(
+        tax_supplier_id = resolver.tax_id(
             product_data.get('VatRate'),
-            type='purchase'
+            'purchase'
         )
-        tax_sale_id = self._get_or_create_tax(
+        tax_sale_id = resolver.tax_id(
             product_data.get('VatRate'),
-            type='sale'
+            'sale'
         )
         # Forzar actualización de impuestos en productos existentes
         product_vals['supplier_taxes_id'] = [
@@ -465,32 +1645,59 @@ class EsprinetCatalogueService(models.AbstractModel):
             })
         return supplier
 
-    def download_and_process_catalogue(self):
-        """Main method to download and process catalogue"""
-        temp_file_path = None
-        try:
-            # Download file
-            temp_file_path = self._download_catalogue_file()
-            _logger.info("Catalogue file downloaded to: %s", temp_file_path)
-            # Process file
-            result = self._process_catalogue_file(temp_file_path)
-
-            _logger.info("Catalogue sync completed successfully: %s", result)
-            return result
+    def _is_pipelined_import(self):
+        """Whether the catalogue is imported while it is being downloaded"""
+        return bool(self.env['ir.config_parameter'].sudo().get_param(
+            'esprinet_connector.catalogue_pipelined'
+        ))
 
-        finally:
-            # Clean up temporary file
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                    _logger.info(
-                        "Temporary file cleaned up: %s",
-                        temp_file_path
-                    )
-                except Exception as e:
-                    _logger.warning(
-                        "Could not clean up temporary file %s: %s",
-                        temp_file_path,
-                        str(e)
-                    )
-            pass
+    def download_and_process_catalogue(self, force=False):
+        """
+        Main method to download and process catalogue
+        :param force: import the catalogue even if it has not changed
+            since the last completed import
+        """
+        Run = self.env['esprinet.catalogue.run']
+        profile = self._new_catalogue_profile()
+
+        if self._is_pipelined_import():
+            config, remote, file_path, state = self._prepare_catalogue_download(force)
+            if state == 'unchanged':
+                return 0
+            source_key = self._get_remote_source_key(remote)
+            if state == 'download' and source_key:
+                # Products are imported while the rest of the file arrives
+                _logger.info("Downloading and importing catalogue in pipelined mode")
+                source = self._get_catalogue_source(file_path, remote)
+                with closing(self._iter_pipelined_download(config, remote, file_path, profile)) as chunks:
+                    result = self._process_catalogue_file(file_path, source, chunks, profile)
+                _logger.info("Catalogue sync completed successfully: %s", result)
+                if Run._is_imported(source_key):
+                    self._clear_catalogue_cache(file_path)
+                return result
+            if state == 'download':
+                # Without SIZE and MDTM the run can only be identified by
+                # the content hash, after the download
+                _logger.info("Remote catalogue version unknown, downloading before importing")
+                file_path = self._fetch_catalogue_file(config, remote, file_path, profile)
+        else:
+            file_path, remote = self._download_catalogue_file(force, profile)
+            if file_path is None:
+                return 0
+        _logger.info("Catalogue file downloaded to: %s", file_path)
+
+        source = self._get_catalogue_source(file_path, remote)
+        if not force and Run._is_imported(source['source_key']):
+            _logger.info("Catalogue content unchanged since the last import, skipping processing")
+            self._clear_catalogue_cache(file_path)
+            return 0
+
+        # Process file
+        result = self._process_catalogue_file(file_path, source, profile=profile)
+        _logger.info("Catalogue sync completed successfully: %s", result)
+
+        # The cached copy is kept while its run is unfinished, so the next
+        # attempt resumes without downloading it again
+        if Run._is_imported(source['source_key']):
+            self._clear_catalogue_cache(file_path)
+        return result
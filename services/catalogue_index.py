@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import sys
+import threading
+
+
+def row_fingerprint(row, *extra):
+    """
+    Huella del contenido de una fila del catálogo (y de los valores extra
+    de los que dependa el producto resultante, como el margen de venta).
+    Es estable entre ejecuciones: las claves se ordenan antes de serializar.
+    """
+    payload = json.dumps(
+        [row, extra],
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ProductIndex(object):
+    """
+    Índice en memoria de las referencias (default_code) y códigos de barras
+    de los productos existentes, para casar las filas del catálogo sin una
+    consulta por producto, y de la huella de la última importación de cada
+    producto. Los valores se internan: en catálogos grandes muchos
+    coinciden con cadenas ya creadas al leer el fichero.
+
+    Los workers de una importación en paralelo comparten el índice: los
+    productos nuevos se apuntan con reserve, que comprueba y añade bajo un
+    mismo bloqueo, y cada producto existente sólo lo actualiza la primera
+    fila que lo reclama con claim, sea cual sea su partición.
+    """
+
+    __slots__ = ('codes', 'barcodes', 'fingerprints', 'claimed', '_lock')
+
+    def __init__(self):
+        # Referencia / código de barras -> id del producto (None si está
+        # pendiente de crear en esta importación)
+        self.codes = {}
+        self.barcodes = {}
+        self.fingerprints = {}
+        # Productos existentes ya casados con una fila en esta importación
+        self.claimed = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.codes)
+
+    @staticmethod
+    def _normalize(value):
+        if value is None or value is False:
+            return None
+        value = str(value).strip()
+        return sys.intern(value) if value else None
+
+    def add(self, code=None, barcode=None, product_id=None, fingerprint=None):
+        """Añade un producto; si la referencia ya existe, gana la primera."""
+        code = self._normalize(code)
+        barcode = self._normalize(barcode)
+        if code:
+            self.codes.setdefault(code, product_id)
+        if barcode:
+            self.barcodes.setdefault(barcode, product_id)
+        if product_id and fingerprint:
+            self.fingerprints[product_id] = fingerprint
+
+    def reserve(self, code=None, barcode=None):
+        """
+        Apunta un producto pendiente de crear si ningún otro tiene ya esa
+        referencia o ese código de barras, de forma atómica entre hilos.
+        :return: True si se ha reservado, False si ya existía
+        """
+        with self._lock:
+            if self.lookup(code, barcode)[0]:
+                return False
+            self.add(code, barcode)
+            return True
+
+    def claim(self, product_id):
+        """
+        Reclama un producto existente para la fila actual, de forma atómica
+        entre hilos.
+        :return: True si ninguna fila lo había reclamado antes
+        """
+        with self._lock:
+            if product_id in self.claimed:
+                return False
+            self.claimed.add(product_id)
+            return True
+
+    def lookup(self, code=None, barcode=None):
+        """
+        :return: (encontrado, id del producto). El id es None si el producto
+            se ha añadido en esta importación y aún no se ha creado.
+        """
+        code = self._normalize(code)
+        if code and code in self.codes:
+            return True, self.codes[code]
+        barcode = self._normalize(barcode)
+        if barcode and barcode in self.barcodes:
+            return True, self.barcodes[barcode]
+        return False, None
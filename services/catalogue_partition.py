@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import os
+import zlib
+
+from . import codec
+
+
+def row_key(row):
+    """Clave de una fila del catálogo: el SKU o, si no tiene, el PartNumber."""
+    return row.get('SKU') or row.get('PartNumber') or ''
+
+
+def product_code(row):
+    """
+    Referencia (default_code) con la que se guarda el producto de una
+    fila: el PartNumber o, si no tiene, el SKU. Es la clave con la que se
+    casan las filas con los productos existentes.
+    """
+    return row.get('PartNumber') or row.get('SKU') or ''
+
+
+def partition_of(key, partitions):
+    """
+    Partición de una clave. Usa crc32 y no hash(), que cambia entre
+    procesos, para que una referencia caiga siempre en la misma partición.
+    """
+    if partitions <= 1:
+        return 0
+    return zlib.crc32(str(key).encode('utf-8')) % partitions
+
+
+class PartitionSpool(object):
+    """
+    Reparte las filas del catálogo en ficheros JSON Lines, uno por
+    partición, para que cada worker lea sólo las suyas. Las filas se
+    reparten por la referencia con la que se casan con los productos
+    (product_code), así que todas las de una misma referencia van a la
+    misma partición. Las que casan con el mismo producto por el código de
+    barras pueden caer en particiones distintas: de esas sólo escribe el
+    producto la primera que lo reclama en el ProductIndex compartido.
+    """
+
+    def __init__(self, directory, partitions):
+        self.paths = [
+            os.path.join(directory, 'partition_%03d.jsonl' % index)
+            for index in range(partitions)
+        ]
+        self.counts = [0] * partitions
+        self._files = []
+
+    def __enter__(self):
+        self._files = [open(path, 'wb') for path in self.paths]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for spool_file in self._files:
+            spool_file.close()
+        self._files = []
+
+    def write(self, row):
+        index = partition_of(product_code(row), len(self.paths))
+        self._files[index].write(codec.dumps(row) + b'\n')
+        self.counts[index] += 1
+        return index
+
+
+def iter_spool(file_obj):
+    """Filas de un fichero de partición abierto en binario."""
+    for line in file_obj:
+        if line.strip():
+            yield codec.loads(line)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+# Líneas del informe de pstats que se guardan de la fase más lenta
+PROFILE_STATS_LINES = 60
+
+
+class CatalogueProfile(object):
+    """
+    Tiempos por fase de una importación del catálogo, filas leídas, bytes
+    descargados y errores por tipo.
+
+    Cada fase cuenta sólo su tiempo propio: si se abre una fase dentro de
+    otra (por ejemplo el parseo de las filas que consume el COPY del
+    staging) la exterior se detiene hasta que acaba la interior. Las fases
+    de los workers en paralelo y la descarga en segundo plano se suman, así
+    que en esos modos pueden superar la duración total.
+
+    Con cprofile=True las fases del hilo que crea el perfil se perfilan
+    además con cProfile, cada una por separado, para guardar el detalle de
+    la más lenta.
+    """
+
+    def __init__(self, cprofile=False):
+        self.seconds = Counter()
+        self.errors = Counter()
+        self.rows = 0
+        self.download_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._owner = threading.get_ident()
+        self._profilers = {} if cprofile else None
+        self._started = time.perf_counter()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.seconds[phase] += seconds
+
+    def add_download(self, size, seconds):
+        with self._lock:
+            self.download_bytes += size
+            self.seconds['download'] += seconds
+
+    def error(self, exception):
+        """Cuenta un error por su tipo (y la columna, si es de validación)."""
+        key = type(exception).__name__
+        column = getattr(exception, 'column', None)
+        if column:
+            key = '%s: %s' % (key, column)
+        with self._lock:
+            self.errors[key] += 1
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _profiler(self, phase):
+        if self._profilers is None or threading.get_ident() != self._owner:
+            return None
+        return self._profilers.setdefault(phase, cProfile.Profile())
+
+    def _resume(self, frame, now):
+        frame[1] = now
+        profiler = self._profiler(frame[0])
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Otro perfilador activo en el proceso: se sigue sin cProfile
+                _logger.warning("cProfile disabled for the catalogue import: %s", e)
+                self._profilers = None
+
+    def _pause(self, frame, now):
+        self.add(frame[0], now - frame[1])
+        profiler = self._profiler(frame[0])
+        if profiler is not None:
+            profiler.disable()
+
+    @contextmanager
+    def phase(self, name):
+        stack = self._stack()
+        now = time.perf_counter()
+        if stack:
+            self._pause(stack[-1], now)
+        frame = [name, now]
+        stack.append(frame)
+        self._resume(frame, now)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            stack.pop()
+            self._pause(frame, now)
+            if stack:
+                self._resume(stack[-1], now)
+
+    def iter_rows(self, rows, phase='parse', count=True):
+        """
+        Filas de rows, contando como phase el tiempo de obtener cada una.
+        Con count, se suman a las filas leídas del fichero.
+        """
+        rows = iter(rows)
+        while True:
+            with self.phase(phase):
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    return
+            if count:
+                with self._lock:
+                    self.rows += 1
+            yield row
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._started
+        return {
+            'duration': elapsed,
+            'rows': self.rows,
+            'rows_per_second': self.rows / elapsed if elapsed else 0.0,
+            'download_bytes': self.download_bytes,
+            'seconds': dict(self.seconds),
+            'errors': dict(self.errors),
+        }
+
+    def slowest_dump(self):
+        """
+        Fase más lenta perfilada con cProfile
+        :return: (fase, informe de pstats, volcado en el formato de
+            Profile.dump_stats) o None sin cProfile
+        """
+        if not self._profilers:
+            return None
+        phase = max(self._profilers, key=lambda name: self.seconds.get(name, 0.0))
+        profiler = self._profilers[phase]
+        profiler.create_stats()
+        # Antes de pstats.Stats, que vacía profiler.stats al cargarlas
+        dump = marshal.dumps(profiler.stats)
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(PROFILE_STATS_LINES)
+        return phase, stream.getvalue(), dump
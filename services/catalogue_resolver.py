@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import Counter
+
+_logger = logging.getLogger(__name__)
+
+
+class ReferenceResolver(object):
+    """
+    Datos de referencia de una importación del catálogo: impuestos por
+    (importe, uso), categorías por nombre, el proveedor Esprinet y el margen
+    de venta. Se cargan una vez al empezar y lo que se crea durante la
+    importación se añade a la caché, de modo que cada fila ya no necesita
+    sus propias búsquedas.
+    """
+
+    def __init__(self, service, parent=None):
+        """
+        :param service: registro de esprinet.catalogue.service, que sabe
+            crear los impuestos, categorías y el proveedor que falten.
+        :param parent: resolver del que copiar las cachés en lugar de
+            cargarlas (ver fork).
+        """
+        self.service = service
+        self.env = service.env
+        self.hits = Counter()
+        self.misses = Counter()
+        self._taxes = {}
+        self._categories = {}
+        self._supplier = None
+        self._margin = None
+        if parent is None:
+            self._load()
+        else:
+            self._taxes.update(parent._taxes)
+            self._categories.update(parent._categories)
+            self._supplier = parent.supplier.with_env(self.env)
+            self._margin = parent.margin
+
+    def _load(self):
+        # Mismo orden que search(limit=1): gana el primero de cada clave
+        for tax in self.env['account.tax'].search([]):
+            self._taxes.setdefault(self._tax_key(tax.amount, tax.type_tax_use), tax.id)
+        for category in self.env['product.category'].search([]):
+            self._categories.setdefault(category.name, category.id)
+
+    @staticmethod
+    def _tax_key(amount, type_tax_use):
+        return round(float(amount), 4), type_tax_use
+
+    def tax_id(self, amount, type_tax_use='purchase'):
+        """Id del impuesto del importe y uso dados, creándolo si no existe."""
+        try:
+            key = self._tax_key(amount, type_tax_use)
+        except (TypeError, ValueError):
+            _logger.warning("Invalid tax amount: %s", amount)
+            return False
+        tax_id = self._taxes.get(key)
+        if tax_id is not None:
+            self.hits['tax'] += 1
+            return tax_id
+        self.misses['tax'] += 1
+        if type_tax_use == 'purchase':
+            tax_id = self.service._create_supplier_tax(amount)
+        else:
+            tax_id = self.service._create_sale_tax(amount)
+        # También se recuerda un fallo al crear, para no repetirlo en cada fila
+        self._taxes[key] = tax_id or False
+        return tax_id or False
+
+    def category_id(self, name):
+        """Id de la categoría con ese nombre, creándola si no existe."""
+        category_id = self._categories.get(name)
+        if category_id is not None:
+            self.hits['category'] += 1
+            return category_id
+        self.misses['category'] += 1
+        category_id = self.service._get_or_create_category(name)
+        self._categories[name] = category_id
+        return category_id
+
+    @property
+    def supplier(self):
+        if self._supplier is None:
+            self.misses['supplier'] += 1
+            self._supplier = self.service._get_or_create_esprinet_supplier()
+        else:
+            self.hits['supplier'] += 1
+        return self._supplier
+
+    @property
+    def margin(self):
+        if self._margin is None:
+            self._margin = self.env['product.template']._get_esprinet_sale_margin()
+        return self._margin
+
+    def warm(self, row):
+        """
+        Resuelve (y crea si faltan) la categoría y los impuestos de una fila
+        del catálogo sin construir el producto.
+        """
+        grouping = row.get('Grouping')
+        if grouping:
+            self.category_id(grouping)
+        vat_rate = row.get('VatRate')
+        if vat_rate is not None:
+            self.tax_id(vat_rate, 'purchase')
+            self.tax_id(vat_rate, 'sale')
+
+    def fork(self, service):
+        """
+        Copia para otro entorno (p. ej. el cursor de un worker) con las
+        cachés ya cargadas. Cada copia lleva sus propias estadísticas, que
+        se suman después con merge_stats.
+        """
+        return ReferenceResolver(service, parent=self)
+
+    def merge_stats(self, other):
+        self.hits.update(other.hits)
+        self.misses.update(other.misses)
+
+    def log_stats(self):
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            _logger.info(
+                "Reference data %s: %s hits, %s misses",
+                kind,
+                self.hits[kind],
+                self.misses[kind]
+            )
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+
+from . import codec
+from .catalogue_index import row_fingerprint
+from .catalogue_partition import product_code, row_key
+
+# Columnas de esprinet_catalogue_staging que se cargan con COPY, en orden
+STAGING_COLUMNS = (
+    'run_id',
+    'sku',
+    'part_number',
+    'default_code',
+    'ean',
+    'description',
+    'grouping',
+    'vat_rate',
+    'dealer_price',
+    'fees',
+    'stock_qty',
+    'depth',
+    'length',
+    'height',
+    'gross_weight',
+    'fingerprint',
+    'payload',
+)
+
+# Filas del catálogo por cada trozo CSV que se entrega a COPY
+COPY_ROWS_PER_CHUNK = 1000
+
+
+def _text(value):
+    if value is None or value is False:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(value):
+    """Número o None: un valor no numérico no debe abortar el COPY entero."""
+    if value is None or value is False or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def staging_record(row, run_id, margin):
+    """
+    Tupla con los valores de STAGING_COLUMNS de una fila del catálogo. La
+    huella es la misma que calcula la importación por ORM, así que se puede
+    comparar en SQL con esprinet_catalogue_fingerprint de product_product.
+    """
+    return (
+        run_id,
+        _text(row_key(row)),
+        _text(row.get('PartNumber')),
+        _text(product_code(row)),
+        _text(row.get('EAN')),
+        _text(row.get('Description')),
+        _text(row.get('Grouping')),
+        _number(row.get('VatRate')),
+        _number(row.get('StandardDealerPrice')),
+        _number(row.get('Fees')),
+        _number(row.get('StockQty')),
+        _number(row.get('Depth')),
+        _number(row.get('Length')),
+        _number(row.get('Height')),
+        _number(row.get('GrossWeight')),
+        row_fingerprint(row, margin),
+        codec.dumps(row).decode('utf-8'),
+    )
+
+
+def iter_copy_chunks(records, rows_per_chunk=COPY_ROWS_PER_CHUNK):
+    """Trozos CSV (bytes UTF-8) para COPY ... FROM STDIN WITH (FORMAT csv)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class CopyReader(io.RawIOBase):
+    """
+    Fichero de sólo lectura sobre un iterable de trozos de bytes, para
+    pasárselo a copy_expert sin generar antes todo el CSV en memoria.
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._current = b''
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts = []
+        while size != 0:
+            if self._pos >= len(self._current):
+                self._current = next(self._chunks, b'')
+                self._pos = 0
+                if not self._current:
+                    break
+            end = len(self._current)
+            if size > 0:
+                end = min(end, self._pos + size)
+                size -= end - self._pos
+            parts.append(self._current[self._pos:end])
+            self._pos = end
+        return b''.join(parts)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
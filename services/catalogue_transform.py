@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_logger = logging.getLogger(__name__)
+
+# Motor del cálculo por columnas: numpy si está instalado, si no Python puro
+TRANSFORM_BACKEND = 'numpy' if numpy is not None else 'python'
+
+# Columnas numéricas obligatorias: un valor no numérico invalida la fila.
+# Si la clave no viene en la fila vale 0, como en la importación por filas.
+REQUIRED_COLUMNS = ('StandardDealerPrice', 'Fees', 'StockQty', 'Depth', 'Length', 'Height')
+
+
+class InvalidRow(ValueError):
+    """Fila con un valor no numérico en una columna obligatoria."""
+
+    def __init__(self, column, value):
+        super().__init__("Invalid %s: %r" % (column, value))
+        self.column = column
+        self.value = value
+
+
+def _to_float(value):
+    """float o NaN: en las columnas NaN marca un valor que no es un número."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class _PythonColumns(object):
+
+    @staticmethod
+    def column(values):
+        return [_to_float(value) for value in values]
+
+    @staticmethod
+    def invalid(column):
+        return [index for index, value in enumerate(column) if math.isnan(value)]
+
+    @staticmethod
+    def add(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    @staticmethod
+    def scale(a, factor):
+        return [x * factor for x in a]
+
+    @staticmethod
+    def volume(depth, length, height):
+        return [d * l * h / 1000 for d, l, h in zip(depth, length, height)]
+
+    @staticmethod
+    def positive(a):
+        return [x > 0 for x in a]
+
+    @staticmethod
+    def tolist(a):
+        return list(a)
+
+
+class _NumpyColumns(object):
+
+    @staticmethod
+    def column(values):
+        try:
+            # Los números del JSON (y None, que pasa a NaN) se convierten en C
+            return numpy.asarray(values, dtype=numpy.float64)
+        except (TypeError, ValueError):
+            return numpy.fromiter((_to_float(value) for value in values), dtype=numpy.float64, count=len(values))
+
+    @staticmethod
+    def invalid(column):
+        return numpy.flatnonzero(numpy.isnan(column)).tolist()
+
+    @staticmethod
+    def add(a, b):
+        return a + b
+
+    @staticmethod
+    def scale(a, factor):
+        return a * factor
+
+    @staticmethod
+    def volume(depth, length, height):
+        return depth * length * height / 1000
+
+    @staticmethod
+    def positive(a):
+        return a > 0
+
+    @staticmethod
+    def tolist(a):
+        return a.tolist()
+
+
+def iter_row_chunks(rows, size):
+    """
+    Bloques de hasta size filas. Si la lectura falla a mitad de bloque
+    (fichero truncado) entrega antes las filas ya leídas y luego relanza
+    el error.
+    """
+    chunk = []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    except ValueError:
+        if chunk:
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
+
+
+def transform_rows(rows, margin, backend=None):
+    """
+    Calcula por columnas, para un bloque de filas del catálogo, los valores
+    numéricos del producto: coste (StandardDealerPrice + Fees), precio de
+    venta con el margen, volumen, peso, stock y si se puede comprar y
+    vender. Los errores de validación se recogen por fila en lugar de
+    lanzarse.
+
+    :param backend: 'numpy' o 'python'; por defecto TRANSFORM_BACKEND.
+    :return: (lista con un dict de valores por fila, o el InvalidRow de
+        la fila si no es válida; dict índice de fila -> InvalidRow)
+    """
+    backend = backend or TRANSFORM_BACKEND
+    ops = _NumpyColumns if backend == 'numpy' else _PythonColumns
+    rows = list(rows)
+    if not rows:
+        return [], {}
+
+    columns = {}
+    errors = {}
+    for key in REQUIRED_COLUMNS:
+        column = ops.column([row.get(key, 0.0) for row in rows])
+        for index in ops.invalid(column):
+            errors.setdefault(index, InvalidRow(key, rows[index].get(key)))
+        columns[key] = column
+
+    cost = ops.add(columns['StandardDealerPrice'], columns['Fees'])
+    list_price = ops.scale(cost, 1 + margin / 100.0)
+    volume = ops.volume(columns['Depth'], columns['Length'], columns['Height'])
+    available = ops.positive(columns['StockQty'])
+
+    # El peso es opcional: vacío o no numérico sólo deja la fila sin peso
+    weight = ops.column([row.get('GrossWeight') or math.nan for row in rows])
+
+    cost, list_price, volume, available, stock, weight = (
+        ops.tolist(values)
+        for values in (cost, list_price, volume, available, columns['StockQty'], weight)
+    )
+
+    results = []
+    for index, row in enumerate(rows):
+        if index in errors:
+            results.append(errors[index])
+            continue
+        values = {
+            'standard_price': cost[index],
+            'list_price': list_price[index],
+            'volume': volume[index],
+            'purchase_ok': bool(available[index]),
+            'sale_ok': bool(available[index]),
+            'supplier_stock_qty': stock[index],
+        }
+        if not math.isnan(weight[index]):
+            values['weight'] = weight[index]
+        elif row.get('GrossWeight'):
+            _logger.warning(
+                "Invalid weight value for product %s: %s",
+                row.get('SKU'),
+                row.get('GrossWeight')
+            )
+        results.append(values)
+    return results, errors
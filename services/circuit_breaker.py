@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import logging
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_SLOW_CALL_THRESHOLD = 10.0
+DEFAULT_RESET_TIMEOUT = 60.0
+DEFAULT_HALF_OPEN_CALLS = 1
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """El circuito del grupo de endpoints está abierto: la petición no se envía."""
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker (por proceso) de una familia de endpoints.
+
+    Se abre tras failure_threshold fallos seguidos (errores de conexión,
+    timeouts, 5xx o llamadas más lentas que slow_call_threshold). Abierto,
+    rechaza las peticiones al instante; pasado reset_timeout deja pasar
+    half_open_calls peticiones de prueba y se cierra si tienen éxito.
+    """
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 slow_call_threshold=DEFAULT_SLOW_CALL_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 half_open_calls=DEFAULT_HALF_OPEN_CALLS, on_state_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self.failures = 0
+        self.last_error = None
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _transition(self, new_state):
+        """Cambia de estado (con el lock tomado) y devuelve el anterior."""
+        old_state = self._state
+        self._state = new_state
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+        elif new_state == CLOSED:
+            self.failures = 0
+        self._probes = 0
+        return old_state
+
+    def _notify(self, old_state, new_state):
+        if old_state == new_state:
+            return
+        log = _logger.warning if new_state == OPEN else _logger.info
+        log("Esprinet circuit '%s' %s -> %s (%s)", self.name, old_state, new_state, self.last_error)
+        if self.on_state_change:
+            try:
+                self.on_state_change(self, old_state, new_state)
+            except Exception as e:
+                _logger.error("Could not record circuit '%s' state: %s", self.name, e)
+
+    def before_call(self):
+        """
+        Lanza CircuitOpenError si la petición no debe enviarse.
+        :return: True si la petición ocupa una de las pruebas de half_open:
+            si no llega a enviarse hay que devolverla con release_probe.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return False
+            if state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+        raise CircuitOpenError("Esprinet circuit '%s' is open" % self.name)
+
+    def release_probe(self):
+        """Libera una prueba de half_open cuyo resultado no se va a informar."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self, elapsed):
+        if elapsed >= self.slow_call_threshold:
+            self.record_failure("slow call: %.1fs" % elapsed)
+            return
+        with self._lock:
+            self.failures = 0
+            old_state = self._state
+            if old_state != CLOSED:
+                self._transition(CLOSED)
+        self._notify(old_state, CLOSED)
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            old_state = self._current_state()
+            new_state = old_state
+            if old_state == HALF_OPEN or (old_state == CLOSED and self.failures >= self.failure_threshold):
+                new_state = OPEN
+                self._transition(OPEN)
+        self._notify(old_state, new_state)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key, name, on_state_change=None, **config):
+    """
+    Devuelve el circuit breaker del proceso para la clave (URL base y
+    credenciales) y el grupo de endpoints, aplicando la configuración actual.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get((key, name))
+        if breaker is None:
+            breaker = _breakers[(key, name)] = CircuitBreaker(name)
+    for attr, value in config.items():
+        setattr(breaker, attr, value)
+    breaker.on_state_change = on_state_change
+    return breaker
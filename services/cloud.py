@@ -2,6 +2,9 @@
 
 from odoo import models
 
+# Metadatos de producto y proveedores de servicio apenas cambian
+METADATA_CACHE_TTL = 24 * 3600
+
 class EsprinetCloudService(models.AbstractModel):
     _name = 'esprinet.api.cloud.service'
     _inherit = 'esprinet.api.base.service'
@@ -25,6 +28,22 @@ class EsprinetCloudService(models.AbstractModel):
         """
         return self._make_request('GET', f'cloud/tenants/{tenant_id}/subscriptions', headers=headers)
 
+    def get_tenants_subscriptions_batch(self, tenant_ids, headers=None):
+        """
+        GET /cloud/tenants/{id}/subscriptions para varios tenants en paralelo.
+        :return: dict id -> respuesta (None si la petición falló)
+        """
+        tenant_ids = list(dict.fromkeys(tenant_ids))
+        results = self._make_batch_request([
+            {
+                'method': 'GET',
+                'endpoint': f'cloud/tenants/{tenant_id}/subscriptions',
+                'headers': headers,
+            }
+            for tenant_id in tenant_ids
+        ])
+        return {tenant_id: result.data for tenant_id, result in zip(tenant_ids, results)}
+
     def update_tenant(self, tenant_id, tenant_data, headers=None):
         """
         PUT /cloud/tenants/{id}
@@ -53,13 +72,13 @@ class EsprinetCloudService(models.AbstractModel):
         """
         GET /cloud/product-metadata
         """
-        return self._make_request('GET', 'cloud/product-metadata', headers=headers)
+        return self._make_request('GET', 'cloud/product-metadata', headers=headers, cache_ttl=METADATA_CACHE_TTL)
 
     def get_service_providers_info(self, headers=None):
         """
         GET /cloud/serviceprovidersinfo
         """
-        return self._make_request('GET', 'cloud/serviceprovidersinfo', headers=headers)
+        return self._make_request('GET', 'cloud/serviceprovidersinfo', headers=headers, cache_ttl=METADATA_CACHE_TTL)
 
     def search_subscriptions(self, headers=None):
         """
@@ -67,6 +86,12 @@ class EsprinetCloudService(models.AbstractModel):
         """
         return self._make_request('GET', 'cloud/subscriptions/search', headers=headers)
 
+    def iter_subscriptions(self, params=None, page_size=None, headers=None):
+        """
+        GET /cloud/subscriptions/search, devolviendo las suscripciones una a una (ver _iter_records)
+        """
+        return self._iter_records('cloud/subscriptions/search', params=params, headers=headers, page_size=page_size)
+
     def get_subscription(self, subscription_id, headers=None):
         """
         GET /cloud/subscriptions/{id}
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from codecs import BOM_UTF8
+
+_logger = logging.getLogger(__name__)
+
+
+def _stdlib_codec():
+    def loads(data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode('utf-8-sig')
+        return json.loads(data)
+
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    return 'json', loads, dumps
+
+
+def _orjson_codec():
+    import orjson
+
+    def loads(data):
+        # orjson no acepta el BOM que a veces trae el catálogo
+        if isinstance(data, str):
+            if data.startswith('\ufeff'):
+                data = data[1:]
+        else:
+            data = bytes(data)
+            if data.startswith(BOM_UTF8):
+                data = data[3:]
+        return orjson.loads(data)
+
+    # OPT_NON_STR_KEYS: json.dumps acepta claves no str (p. ej. ids enteros)
+    def dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    return 'orjson', loads, dumps
+
+
+def _ujson_codec():
+    import ujson
+
+    def loads(data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode('utf-8-sig')
+        return ujson.loads(data)
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+    return 'ujson', loads, dumps
+
+
+# Orden de preferencia: el primero instalado es el que se usa
+CODEC_FACTORIES = (
+    ('orjson', _orjson_codec),
+    ('ujson', _ujson_codec),
+    ('json', _stdlib_codec),
+)
+
+
+def get_codec(name=None):
+    """
+    Devuelve (nombre, loads, dumps) del codec indicado o, sin nombre, del
+    más rápido instalado. loads acepta bytes o str; dumps devuelve bytes
+    UTF-8.
+    """
+    for codec_name, factory in CODEC_FACTORIES:
+        if name and codec_name != name:
+            continue
+        try:
+            return factory()
+        except ImportError:
+            if name:
+                raise
+    return _stdlib_codec()
+
+
+def available_codecs():
+    codecs = []
+    for codec_name, factory in CODEC_FACTORIES:
+        try:
+            codecs.append(factory())
+        except ImportError:
+            continue
+    return codecs
+
+
+CODEC_NAME, loads, dumps = get_codec()
+_logger.debug("Using %s as JSON codec", CODEC_NAME)
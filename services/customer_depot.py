@@ -25,6 +25,12 @@ class EsprinetCustomerDepotService(models.AbstractModel):
         """
         return self._make_request('GET', 'customerDepot/products/all', headers=headers)
 
+    def iter_all_products(self, page_size=None, headers=None):
+        """
+        GET /customerDepot/products/all, devolviendo los productos uno a uno (ver _iter_records)
+        """
+        return self._iter_records('customerDepot/products/all', headers=headers, page_size=page_size)
+
     def get_products(self, headers=None):
         """
         GET /customerDepot/products
@@ -13,6 +13,12 @@ class EsprinetDeliveryNotesService(models.AbstractModel):
         """
         return self._make_request('GET', 'deliveryNotes', headers=headers)
 
+    def iter_delivery_notes(self, page_size=None, headers=None):
+        """
+        GET /deliveryNotes, devolviendo los albaranes uno a uno (ver _iter_records)
+        """
+        return self._iter_records('deliveryNotes', headers=headers, page_size=page_size)
+
     def get_delivery_note(self, note_id, headers=None):
         """
         GET /deliveryNotes/{id}
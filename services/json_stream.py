@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import codecs
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+# Caracteres con los que puede seguir un número JSON ya decodificable
+_NUMBER_TAIL = '.eE+-'
+_decoder = json.JSONDecoder()
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _StreamBuffer(object):
+    """
+    Texto pendiente de un flujo JSON que se lee por trozos. Sólo guarda lo
+    que aún no se ha consumido, así que la memoria depende del tamaño del
+    trozo y del elemento más grande, no del documento.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        # utf-8-sig descarta el BOM que a veces trae el catálogo
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Añade el siguiente trozo. Devuelve False al final del flujo."""
+        if self.eof:
+            return False
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                self.text += chunk
+                return True
+        self.eof = True
+        tail = self._decoder.decode(b'', final=True)
+        self.text += tail
+        return bool(tail)
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError("Expected %r in JSON stream, found %r" % (char, found))
+        self.pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                # Valor incompleto: leer más (o error real si no hay más)
+                if not self.fill():
+                    raise
+                continue
+            # Un número al final del buffer puede estar cortado, también
+            # en medio de la parte decimal o del exponente ("1." o "2e-")
+            if end == len(self.text) or (
+                    _is_number(value) and not self.text[end:].strip(_NUMBER_TAIL)):
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def _seek_array_member(buf, key):
+    """
+    Avanza dentro de un objeto hasta el valor del miembro key (o el primer
+    miembro cuyo valor sea un array si key es None), saltando el resto.
+    """
+    separator = ','
+    while separator == ',':
+        if buf.peek() == '}':
+            break
+        name = buf.value()
+        buf.expect(':')
+        if name == key or (key is None and buf.peek() == '['):
+            return
+        buf.value()
+        separator = buf.peek()
+        buf.pos += 1
+    if separator not in ',}':
+        raise ValueError("Expected ',' in JSON object, found %r" % separator)
+    raise ValueError("JSON object has no %s array" % (repr(key) if key else 'member'))
+
+
+def iter_array_items(chunks, key=None):
+    """
+    Generador que devuelve uno a uno los elementos de un array JSON leído
+    por trozos (bytes o str), sin cargar el documento entero en memoria.
+
+    El array puede ser el documento (lo normal en Catalogue.json) o un
+    miembro de un objeto raíz: el indicado por key o, si no se indica, el
+    primero cuyo valor sea un array.
+
+    :raises ValueError: si el JSON no es válido o no contiene el array.
+    """
+    buf = _StreamBuffer(chunks)
+    if buf.peek() == '{':
+        buf.pos += 1
+        _seek_array_member(buf, key)
+    elif key is not None:
+        raise ValueError("Expected a JSON object with a %r member" % key)
+
+    buf.expect('[')
+    if buf.peek() == ']':
+        return
+    while True:
+        yield buf.value()
+        separator = buf.peek()
+        buf.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError("Expected ',' or ']' in JSON array, found %r" % separator)
+
+
+def iter_file_chunks(file_obj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lee un fichero abierto en binario por trozos."""
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import os
+import platform
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_MIB = 1024 * 1024
+
+
+def memory_usage():
+    """
+    (rss, memoria que vigila Odoo) del proceso en bytes. Como
+    odoo.service.server.memory_info, compara el tamaño virtual (vms) con
+    limit_memory_soft salvo en macOS, donde usa el rss. Sin psutil se lee
+    /proc/self/statm; si tampoco existe devuelve (None, None).
+    """
+    if psutil is not None:
+        info = psutil.Process(os.getpid()).memory_info()
+        return info.rss, info.rss if platform.system() == 'Darwin' else info.vms
+    try:
+        with open('/proc/self/statm') as statm:
+            vms, rss = (int(value) * os.sysconf('SC_PAGE_SIZE') for value in statm.read().split()[:2])
+        return rss, vms
+    except (OSError, ValueError, AttributeError):
+        return None, None
+
+
+def peak_rss():
+    """Máximo rss alcanzado por el proceso en bytes, o None si no se conoce."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KiB y macOS en bytes
+    return peak if platform.system() == 'Darwin' else peak * 1024
+
+
+def format_mib(value):
+    return '?' if value is None else '%.0f MiB' % (value / _MIB)
@@ -2,6 +2,9 @@
 
 from odoo import models
 
+# Los transportistas apenas cambian: se cachean un día
+SHIPPERS_CACHE_TTL = 24 * 3600
+
 class EsprinetOrdersService(models.AbstractModel):
     _name = 'esprinet.api.orders.service'
     _inherit = 'esprinet.api.base.service'
@@ -13,6 +16,12 @@ class EsprinetOrdersService(models.AbstractModel):
         """
         return self._make_request('GET', 'orders', headers=headers)
 
+    def iter_orders(self, page_size=None, headers=None):
+        """
+        GET /orders, devolviendo los pedidos uno a uno (ver _iter_records)
+        """
+        return self._iter_records('orders', headers=headers, page_size=page_size)
+
     def create_order(self, order_data, headers=None):
         """
         POST /orders
@@ -88,7 +97,7 @@ class EsprinetOrdersService(models.AbstractModel):
         """
         GET /orders/freightForwading/Shippers
         """
-        return self._make_request('GET', 'orders/freightForwading/Shippers', headers=headers)
+        return self._make_request('GET', 'orders/freightForwading/Shippers', headers=headers, cache_ttl=SHIPPERS_CACHE_TTL)
 
     def validate_apple_order(self, validation_data, headers=None):
         """
@@ -30,3 +30,54 @@ class EsprinetProductsService(models.AbstractModel):
             params['customerProductCode'] = customer_product_code
             
         return self._make_request('GET', 'products/pricing', params=params, headers=headers)
+
+    def _get_products_batch(self, endpoints, esprinet_product_codes, headers=None):
+        """
+        Pide cada código a cada endpoint en un único lote paralelo.
+        :return: dict endpoint -> dict código -> respuesta
+        """
+        codes = list(dict.fromkeys(code for code in esprinet_product_codes if code))
+        keys = [(endpoint, code) for endpoint in endpoints for code in codes]
+        results = self._make_batch_request([
+            {
+                'method': 'GET',
+                'endpoint': endpoint,
+                'params': {'esprinetProductCode': code},
+                'headers': headers,
+            }
+            for endpoint, code in keys
+        ])
+        by_endpoint = {endpoint: {} for endpoint in endpoints}
+        for (endpoint, code), result in zip(keys, results):
+            by_endpoint[endpoint][code] = result.data
+        return by_endpoint
+
+    def get_availability_batch(self, esprinet_product_codes, headers=None):
+        """
+        GET /products/availability para varios códigos en paralelo.
+        :return: dict código -> respuesta (None si la petición falló)
+        """
+        return self._get_products_batch(
+            ['products/availability'], esprinet_product_codes, headers=headers
+        )['products/availability']
+
+    def get_pricing_batch(self, esprinet_product_codes, headers=None):
+        """
+        GET /products/pricing para varios códigos en paralelo.
+        :return: dict código -> respuesta (None si la petición falló)
+        """
+        return self._get_products_batch(
+            ['products/pricing'], esprinet_product_codes, headers=headers
+        )['products/pricing']
+
+    def get_pricing_and_availability_batch(self, esprinet_product_codes, headers=None):
+        """
+        GET /products/pricing y /products/availability para varios códigos,
+        todas las peticiones en el mismo lote paralelo.
+        :return: (dict código -> precios, dict código -> disponibilidad),
+            con None si la petición falló
+        """
+        by_endpoint = self._get_products_batch(
+            ['products/pricing', 'products/availability'], esprinet_product_codes, headers=headers
+        )
+        return by_endpoint['products/pricing'], by_endpoint['products/availability']
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+DEFAULT_RATE_LIMIT = 10.0
+DEFAULT_RATE_BURST = 20
+DEFAULT_RATE_LEASE = 5
+# Segundos máximos que una petición espera a tener cupo antes de abandonar
+DEFAULT_RATE_WAIT = 30.0
+# Un lote de tokens concedido al proceso caduca pasado este tiempo, para que
+# un proceso inactivo no acumule cupo y lo gaste de golpe más tarde
+LEASE_LIFETIME = 1.0
+
+
+class RateLimiter(object):
+    """
+    Lado local (por proceso) del token bucket compartido entre workers.
+
+    El bucket vive en base de datos (esprinet.rate.bucket) y se consulta
+    pidiendo varios tokens a la vez; el proceso los va gastando en memoria
+    y sólo vuelve a la base de datos cuando se le acaban. Un lock por clave
+    garantiza que un único hilo recarga mientras el resto espera.
+    """
+
+    def __init__(self):
+        self._leases = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _take_leased(self, key, now):
+        count, granted_at = self._leases.get(key, (0, 0.0))
+        if count >= 1 and now - granted_at < LEASE_LIFETIME:
+            self._leases[key] = (count - 1, granted_at)
+            return True
+        return False
+
+    def acquire(self, key, refill, lease=DEFAULT_RATE_LEASE, timeout=DEFAULT_RATE_WAIT):
+        """
+        Consume un token para la clave, esperando si no hay cupo.
+
+        :param refill: función refill(count) -> (concedidos, espera) que pide
+            hasta count tokens al bucket compartido.
+        :return: True si se obtuvo el token, False si se agotó el timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock(key):
+                now = time.monotonic()
+                if self._take_leased(key, now):
+                    return True
+                granted, wait = refill(lease)
+                if granted >= 1:
+                    self._leases[key] = (granted - 1, now)
+                    return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def reset(self, key=None):
+        if key is None:
+            self._leases.clear()
+        else:
+            self._leases.pop(key, None)
+
+
+rate_limiter = RateLimiter()
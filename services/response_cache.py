@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Cuerpo de la respuesta (bytes), momento de caducidad (epoch) y validadores
+# para revalidar con If-None-Match / If-Modified-Since.
+CacheEntry = namedtuple('CacheEntry', ['body', 'expires_at', 'etag', 'last_modified'])
+
+
+class ResponseCache(object):
+    """
+    Caché LRU (por proceso) de respuestas de la API, limitada por memoria.
+
+    Guarda el cuerpo sin decodificar: así el tamaño es exacto y cada lectura
+    devuelve objetos nuevos que el llamador puede modificar sin afectar a
+    la caché.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts):
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Devuelve la entrada (aunque esté caducada) o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        size = len(entry.body)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous.body)
+            if size > self.max_bytes:
+                return
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted.body)
+            self._entries[key] = entry
+            self.current_bytes += size
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.current_bytes = 0
+            else:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.current_bytes -= len(entry.body)
+
+
+def is_fresh(entry, now=None):
+    return entry is not None and (now or time.time()) < entry.expires_at
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+import random
+import time
+import logging
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Respuestas transitorias que merece la pena reintentar
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+# 429 y 503 indican que la petición no se ha procesado, así que también se
+# pueden reintentar las que no son idempotentes (POST, PATCH)
+RETRY_UNPROCESSED_STATUS_CODES = frozenset((429, 503))
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+RetryPolicy = namedtuple('RetryPolicy', ['max_retries', 'backoff_base', 'backoff_max'])
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """No se obtuvo cupo del limitador de peticiones a tiempo."""
+
+
+def parse_retry_after(value, now=None):
+    """
+    Interpreta la cabecera Retry-After (segundos o fecha HTTP).
+    :return: segundos a esperar, o None si no es válida.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def backoff_delay(policy, attempt):
+    """Backoff exponencial con jitter completo."""
+    return random.uniform(0, min(policy.backoff_max, policy.backoff_base * (2 ** attempt)))
+
+
+def _can_retry_error(method, error):
+    if method in IDEMPOTENT_METHODS:
+        return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+    # Sin idempotencia sólo es seguro si la conexión no llegó a establecerse
+    return isinstance(error, requests.exceptions.ConnectTimeout)
+
+
+def send_with_retry(session, request, policy, acquire=None, breaker=None, sleep=time.sleep):
+    """
+    Envía la petición reintentando los errores transitorios (429, 5xx,
+    timeouts y errores de conexión) con backoff exponencial y respetando
+    Retry-After. No usa el entorno de Odoo, así que puede llamarse desde
+    cualquier hilo.
+
+    :param acquire: función sin argumentos que consume cupo del limitador
+        y devuelve False si no lo consigue a tiempo.
+    :param breaker: CircuitBreaker del grupo de endpoints; se consulta antes
+        de cada intento, ya con el cupo del limitador, y se le informa del
+        resultado. Si el intento no llega a informarlo, se le devuelve la
+        prueba de half_open que hubiera ocupado.
+    :return: la última respuesta recibida (el llamador comprueba su estado).
+    """
+    method = request['method'].upper()
+    attempt = 0
+    while True:
+        # El cupo se pide antes de ocupar una prueba del circuito: si no se
+        # consigue, el circuito no queda esperando un resultado que no llega
+        if acquire is not None and not acquire():
+            raise RateLimitExceeded("No rate limit capacity for %s" % request['url'])
+        probe = breaker.before_call() if breaker is not None else False
+
+        started = time.monotonic()
+        reported = False
+        try:
+            try:
+                response = session.request(**request)
+            except requests.exceptions.RequestException as e:
+                if breaker is not None:
+                    breaker.record_failure(e)
+                    reported = True
+                if attempt >= policy.max_retries or not _can_retry_error(method, e):
+                    raise
+                delay = backoff_delay(policy, attempt)
+                _logger.warning(
+                    "Retrying %s %s in %.2fs after error: %s",
+                    method, request['url'], delay, e
+                )
+            else:
+                status = response.status_code
+                if breaker is not None:
+                    if status >= 500:
+                        breaker.record_failure("HTTP %s" % status)
+                    else:
+                        breaker.record_success(time.monotonic() - started)
+                    reported = True
+                retryable = status in (
+                    RETRY_STATUS_CODES if method in IDEMPOTENT_METHODS
+                    else RETRY_UNPROCESSED_STATUS_CODES
+                )
+                if not retryable or attempt >= policy.max_retries:
+                    return response
+                delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = backoff_delay(policy, attempt)
+                elif delay > policy.backoff_max:
+                    _logger.warning(
+                        "Retry-After of %ss for %s exceeds the %ss limit, not retrying",
+                        delay, request['url'], policy.backoff_max
+                    )
+                    return response
+                _logger.warning(
+                    "Retrying %s %s in %.2fs after HTTP %s",
+                    method, request['url'], delay, status
+                )
+                response.close()
+        finally:
+            # Una prueba de half_open sin resultado (la petición no llegó a
+            # enviarse) se devuelve para que el circuito no quede bloqueado
+            if probe and not reported:
+                breaker.release_probe()
+
+        attempt += 1
+        sleep(delay)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+import time
+
+# Segundos antes de expiresUtc a partir de los cuales el token se renueva
+REFRESH_MARGIN = 120
+
+
+class TokenCache(object):
+    """
+    Caché en memoria (por proceso) de tokens de autenticación.
+
+    Las entradas se indexan por URL base y credenciales, y cada clave tiene
+    su propio lock para que un único hilo del proceso haga el login
+    mientras el resto espera su resultado.
+    """
+
+    def __init__(self, refresh_margin=REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def make_key(base_url, username, password):
+        digest = hashlib.sha256(
+            f"{base_url}\x00{username}\x00{password}".encode('utf-8')
+        ).hexdigest()
+        return digest
+
+    @staticmethod
+    def advisory_lock_id(key):
+        """Identificador de 64 bits para pg_advisory_xact_lock."""
+        return int.from_bytes(bytes.fromhex(key)[:8], 'big', signed=True)
+
+    def is_fresh(self, expires_at, now=None):
+        now = time.time() if now is None else now
+        return bool(expires_at) and now < expires_at - self.refresh_margin
+
+    def get(self, key):
+        """Devuelve el token si no está a punto de expirar, si no None."""
+        entry = self._tokens.get(key)
+        if entry and self.is_fresh(entry[1]):
+            return entry[0]
+        return None
+
+    def set(self, key, token, expires_at):
+        self._tokens[key] = (token, expires_at)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._tokens.clear()
+        else:
+            self._tokens.pop(key, None)
+
+    def lock(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+token_cache = TokenCache()
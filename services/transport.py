@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_pooled_session(pool_size=DEFAULT_POOL_SIZE):
+    """
+    Devuelve la sesión HTTP compartida del proceso actual.
+
+    La sesión se crea una sola vez por proceso (los workers de Odoo se
+    bifurcan, por eso la clave incluye el pid) y tamaño de pool, de modo
+    que todas las llamadas reutilizan las conexiones TCP/TLS abiertas.
+    La sesión no guarda cabeceras de autenticación: cada petición envía
+    las suyas, así puede compartirse entre hilos sin condiciones de carrera.
+    """
+    key = (os.getpid(), pool_size)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=0,
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # gzip/deflate siempre; br si brotli está instalado (urllib3
+            # sólo anuncia las codificaciones que sabe descomprimir)
+            session.headers.update({
+                'Connection': 'keep-alive',
+                'Accept-Encoding': ACCEPT_ENCODING,
+            })
+            _sessions[key] = session
+            _logger.info(
+                "Created pooled Esprinet HTTP session (pid %s, pool size %s)",
+                key[0],
+                pool_size
+            )
+        return session
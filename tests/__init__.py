@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_catalogue_reimport
+from . import test_json_stream
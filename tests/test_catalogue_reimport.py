@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCatalogueReimport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.service = cls.env['esprinet.catalogue.service']
+        cls.rows = [
+            # PartNumber distinto del SKU y sin EAN: se guarda con el PartNumber
+            {
+                'SKU': 'HP0000001',
+                'PartNumber': 'HP-4A1B2C',
+                'EAN': '',
+                'Description': 'Monitor HP 24',
+                'Grouping': 'Monitores',
+                'VatRate': 21.0,
+                'StandardDealerPrice': 120.5,
+                'Fees': 0.0,
+                'StockQty': 7,
+            },
+            # Sin PartNumber: se guarda con el SKU
+            {
+                'SKU': 'LE0000002',
+                'EAN': '4006381333931',
+                'Description': 'Ratón Lenovo',
+                'Grouping': 'Periféricos',
+                'VatRate': 21.0,
+                'StandardDealerPrice': 9.9,
+                'Fees': 0.25,
+                'StockQty': 0,
+            },
+            # Sin SKU: se guarda con el PartNumber
+            {
+                'PartNumber': 'SA-00FF00',
+                'EAN': '',
+                'Description': 'Disco SSD Samsung',
+                'Grouping': 'Almacenamiento',
+                'VatRate': 21.0,
+                'StandardDealerPrice': 55.0,
+                'Fees': 0.0,
+                'StockQty': 30,
+            },
+        ]
+
+    def setUp(self):
+        super().setUp()
+        # La importación confirma cada lote
+        self.patch(self.env.cr, 'commit', lambda: None)
+
+    def _import(self, rows):
+        return self.service._import_catalogue_rows(
+            iter(rows),
+            self.service._get_reference_resolver(),
+            self.service._build_product_index(),
+            True
+        )
+
+    def _catalogue_products(self):
+        return self.env['product.product'].search([
+            ('default_code', 'in', ['HP-4A1B2C', 'LE0000002', 'SA-00FF00']),
+        ])
+
+    def test_reimport_creates_nothing(self):
+        results = self._import(self.rows)
+        self.assertEqual(results['created'], 3)
+        self.assertEqual(len(self._catalogue_products()), 3)
+
+        results = self._import(self.rows)
+        self.assertEqual(results['created'], 0)
+        self.assertEqual(results['unchanged'], 3)
+        self.assertEqual(len(self._catalogue_products()), 3)
+
+    def test_reimport_updates_changed_rows(self):
+        self._import(self.rows)
+
+        rows = [dict(row) for row in self.rows]
+        rows[0]['StockQty'] = 2
+        rows[0]['StandardDealerPrice'] = 99.0
+        results = self._import(rows)
+
+        self.assertEqual(results['created'], 0)
+        self.assertEqual(results['updated'], 1)
+        self.assertEqual(results['unchanged'], 2)
+        product = self.env['product.product'].search([('default_code', '=', 'HP-4A1B2C')])
+        self.assertEqual(len(product), 1)
+        self.assertEqual(product.supplier_stock_qty, 2)
+
+    def test_failed_batch_counts_errors(self):
+        supplier = self.service._get_reference_resolver().supplier
+        # El mismo código de barras: el lote falla y se reintenta uno a uno
+        prepared = [
+            ({'name': 'Producto A', 'default_code': 'BENCH-A', 'barcode': '8412345678905'}, 10.0),
+            ({'name': 'Producto B', 'default_code': 'BENCH-B', 'barcode': '8412345678905'}, 12.0),
+        ]
+        counts = self.service._create_products_batch(supplier, prepared)
+        self.assertEqual(counts, Counter(created=1, error=1))
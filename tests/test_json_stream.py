@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from odoo.tests.common import BaseCase
+
+from odoo.addons.esprinet_connector.services.json_stream import iter_array_items
+
+
+def _chunks(data, size):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+class TestJsonStream(BaseCase):
+    """El resultado no depende de dónde caigan los cortes entre trozos."""
+
+    def _assert_sweep(self, document, expected, key=None, max_size=None):
+        data = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        for size in range(1, (max_size or len(data)) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_array_items(_chunks(data, size), key)), expected)
+
+    def test_numbers(self):
+        numbers = [0, 1, -7, 10.5, 1.0, -0.25, 1e-05, 2.5e+20, -3e+100, 123456789012]
+        self._assert_sweep(numbers, numbers)
+
+    def test_number_cut_in_fraction_or_exponent(self):
+        for text, expected in (('[1.5]', [1.5]), ('[2e-3,4]', [0.002, 4]), ('[-6E+2]', [-600.0])):
+            for cut in range(1, len(text)):
+                with self.subTest(text=text, cut=cut):
+                    chunks = [text[:cut].encode(), text[cut:].encode()]
+                    self.assertEqual(list(iter_array_items(chunks)), expected)
+
+    def test_objects(self):
+        rows = [
+            {'SKU': 'HP0000001', 'EAN': '', 'StandardDealerPrice': 120.5, 'StockQty': 7},
+            {'SKU': 'LE0000002', 'Description': 'Ratón «Lenovo» ñ €', 'Fees': 0.25, 'Weight': 1e-3},
+            {'SKU': None, 'Active': True, 'Tags': ['a', 'b'], 'Nested': {'x': [1, 2.5e3]}},
+        ]
+        self._assert_sweep(rows, rows)
+
+    def test_member_of_root_object(self):
+        document = {'total': 2.5, 'items': [{'id': 1}, {'id': 2.75}], 'next': None}
+        self._assert_sweep(document, [{'id': 1}, {'id': 2.75}], key='items')
+        self._assert_sweep(document, [{'id': 1}, {'id': 2.75}])
+
+    def test_empty_array(self):
+        self._assert_sweep([], [])
+
+    def test_truncated_array(self):
+        for size in (1, 3, 64):
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    list(iter_array_items(_chunks(b'[1, 2.5, {"a": 1', size)))